@@ -2,18 +2,88 @@ from django.views import View
 from django.views.generic import TemplateView
 from django.shortcuts import render, redirect
 from django.http import JsonResponse
-from rest_framework_simplejwt.tokens import UntypedToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.permissions import IsAuthenticated
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user_model
 import jwt
 from django.conf import settings
+import hashlib
 import logging
+import threading
+import time
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+User = get_user_model()
+
+# Cache validated admin tokens so repeat page loads skip JWT verification. Only the user id
+# is cached; the user's admin and active flags are re-read on every request
+TOKEN_CACHE_TTL = 60  # seconds
+TOKEN_CACHE_MAXSIZE = 10000
+_token_cache = {}
+_token_cache_lock = threading.Lock()
+
+def get_token_cache_key(token):
+    """Key cached tokens by a digest so raw tokens are never held in memory as keys"""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+def get_cached_token_user_id(cache_key):
+    """Return the user id of a previously validated token, or None if missing/expired"""
+    with _token_cache_lock:
+        entry = _token_cache.get(cache_key)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.time():
+            del _token_cache[cache_key]
+            return None
+        return user_id
+
+def get_active_admin(user_id):
+    """Load a user if they are still an active admin, else None"""
+    user = User.objects.only(
+        'id', 'email', 'is_active', 'active', 'is_staff', 'is_superuser'
+    ).filter(pk=user_id).first()
+    if user is None:
+        logger.error("User with id %s does not exist", user_id)
+        return None
+    if not (user.is_active and user.active):
+        logger.warning("User %s is deactivated", user.email)
+        return None
+    if not (user.is_staff or user.is_superuser):
+        logger.warning("User %s is not admin", user.email)
+        return None
+    return user
+
+def cache_token_user_id(cache_key, user_id, exp):
+    """Cache a successfully validated token, never beyond the token's own expiry"""
+    now = time.time()
+    expires_at = now + TOKEN_CACHE_TTL
+    if exp:
+        expires_at = min(expires_at, float(exp))
+    if expires_at <= now:
+        return
+    with _token_cache_lock:
+        if len(_token_cache) >= TOKEN_CACHE_MAXSIZE:
+            # Drop expired entries first, then the oldest insertions
+            for key in [k for k, (_, exp_at) in _token_cache.items() if exp_at <= now]:
+                del _token_cache[key]
+            while len(_token_cache) >= TOKEN_CACHE_MAXSIZE:
+                del _token_cache[next(iter(_token_cache))]
+        _token_cache[cache_key] = (user_id, expires_at)
+
+
+def admin_auth_failed(request):
+    """API clients get a 401 JSON response; browsers are redirected to the admin dashboard"""
+    if 'application/json' in request.headers.get('Accept', '') or 'Authorization' in request.headers:
+        return JsonResponse(
+            {'detail': 'unauthorized'},
+            status=401,
+            headers={'WWW-Authenticate': 'Bearer'}
+        )
+    return redirect('admin-dashboard')
+
 
 class AdminView(View):
     def get(self, request):
@@ -27,93 +97,76 @@ class AdminRegisterView(View):
         return render(request, 'admin-register.html')
 class AdminReprocessView(View):
     def get(self, request):
-        logger.info("=== AdminReprocessView: Starting token validation ===")
-        
-        auth_header = request.META.get('HTTP_AUTHORIZATION')
-        logger.info(f"Authorization header: {auth_header}")
+        logger.debug("=== AdminReprocessView: Starting token validation ===")
         
-        token = None
+        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
         
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-            logger.info(f"Token extracted from Authorization header: {token[:20]}..." if token else "None")
+        if auth_header.startswith('Bearer '):
+            token = auth_header[7:]
         else:
-            logger.info("No Bearer token in Authorization header, checking cookies and GET params")
-            # Fallback: Check cookies and GET parameters for direct access
-            cookie_token = request.COOKIES.get('admin_token')
-            get_token = request.GET.get('token')
-            
-            logger.info(f"Cookie token: {cookie_token[:20] + '...' if cookie_token else 'None'}")
-            logger.info(f"GET token: {get_token[:20] + '...' if get_token else 'None'}")
-            
-            token = cookie_token or get_token
-        
-        logger.info(f"Final token to validate: {token[:20] + '...' if token else 'None'}")
+            # No Bearer header: fall back to the cookie, then the query string, for direct page access
+            token = request.COOKIES.get('admin_token') or request.GET.get('token')
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("No Bearer token in Authorization header, token %s in cookie/GET params",
+                             "found" if token else "not found")
         
         if not token:
-            logger.warning("No token found anywhere - redirecting to admin-dashboard")
-            return redirect('admin-dashboard')
+            logger.warning("No token found anywhere")
+            return admin_auth_failed(request)
+        
+        cache_key = get_token_cache_key(token)
+        cached_user_id = get_cached_token_user_id(cache_key)
+        if cached_user_id is not None:
+            logger.debug("Token found in validation cache for user id: %s", cached_user_id)
+            user = get_active_admin(cached_user_id)
+            if user is None:
+                return admin_auth_failed(request)
+            return render(request, 'reprocess.html', {
+                'user': user,
+                'is_admin': True
+            })
         
         try:
-            logger.info("Attempting to validate token with UntypedToken")
-            # Validate token and get user
-            validated_token = UntypedToken(token)
-            logger.info("Token validation with UntypedToken successful")
-            
-            logger.info("Attempting to decode token with jwt.decode")
-            # Decode token to get user info
+            logger.debug("Attempting to decode token with jwt.decode")
+            # Verify signature and expiry and decode the payload in a single pass
             decoded_token = jwt.decode(
                 token, 
                 settings.SECRET_KEY, 
-                algorithms=['HS256']
+                algorithms=['HS256'],
+                options={'require': ['exp', 'user_id']}
             )
-            logger.info(f"Token decoded successfully. Payload: {decoded_token}")
+            logger.debug("Token decoded successfully. Payload: %s", decoded_token)
             
             user_id = decoded_token.get('user_id')
-            logger.info(f"Extracted user_id: {user_id}")
             
             if not user_id:
-                logger.warning("No user_id found in token - redirecting to admin-dashboard")
-                return redirect('admin-dashboard')
+                logger.warning("No user_id found in token")
+                return admin_auth_failed(request)
             
-            # Get user and check if they're admin
-            try:
-                logger.info(f"Attempting to get user with id: {user_id}")
-                user = User.objects.get(id=user_id)
-                logger.info(f"User found: {user.username}, is_staff: {user.is_staff}, is_superuser: {user.is_superuser}")
-                
-                if not (user.is_staff or user.is_superuser):
-                    logger.warning(f"User {user.username} is not admin - redirecting to admin-dashboard")
-                    return redirect('admin-dashboard')
-                    
-            except User.DoesNotExist:
-                logger.error(f"User with id {user_id} does not exist - redirecting to admin-dashboard")
-                return redirect('admin-dashboard')
+            # Get user and check they're still an active admin
+            logger.debug("Attempting to get user with id: %s", user_id)
+            user = get_active_admin(user_id)
+            if user is None:
+                return admin_auth_failed(request)
             
-            # Token is valid and user is admin, render the page
-            logger.info(f"All checks passed! Rendering reprocess.html for user: {user.username}")
+            # Token is valid and user is admin, cache the result and render the page
+            cache_token_user_id(cache_key, user.pk, decoded_token.get('exp'))
+            logger.info("Rendering reprocess.html for admin user: %s", user.email)
             return render(request, 'reprocess.html', {
                 'user': user,
                 'is_admin': True
             })
             
-        except InvalidToken as e:
-            logger.error(f"InvalidToken error: {str(e)} - redirecting to admin-dashboard")
-            return redirect('admin-dashboard')
-        except TokenError as e:
-            logger.error(f"TokenError: {str(e)} - redirecting to admin-dashboard")
-            return redirect('admin-dashboard')
         except jwt.ExpiredSignatureError as e:
-            logger.error(f"JWT ExpiredSignatureError: {str(e)} - redirecting to admin-dashboard")
-            return redirect('admin-dashboard')
+            logger.error("JWT ExpiredSignatureError: %s", e)
+            return admin_auth_failed(request)
         except jwt.InvalidTokenError as e:
-            logger.error(f"JWT InvalidTokenError: {str(e)} - redirecting to admin-dashboard")
-            return redirect('admin-dashboard')
+            logger.error("JWT InvalidTokenError: %s", e)
+            return admin_auth_failed(request)
         except Exception as e:
-            logger.error(f"Unexpected error: {type(e).__name__}: {str(e)} - redirecting to admin-dashboard")
-            import traceback
-            logger.error(f"Full traceback: {traceback.format_exc()}")
-            return redirect('admin-dashboard')
+            # logger.exception only formats the traceback if the record is emitted
+            logger.exception("Unexpected error: %s: %s", type(e).__name__, e)
+            return admin_auth_failed(request)
 class FeedbackManagementView(View):
     def get(self, request):
         return render(request, 'feedback-management.html')
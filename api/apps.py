@@ -1,6 +1,40 @@
+import logging
+import os
+import sys
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
+# Server entry points whose worker processes should load models at startup
+SERVER_COMMANDS = ('gunicorn', 'uvicorn', 'daphne')
+
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        """Connect signals, then warm the career models once per server process so the first request doesn't pay for loading"""
+        from . import signals  # noqa: F401
+
+        if not should_warm_models():
+            return
+        try:
+            from .careermodel_utils import get_career_predictor
+            career_predictor = get_career_predictor()
+            if career_predictor:
+                career_predictor._ensure_models_loaded()
+        except Exception as e:
+            # Lazy loading on first request remains the fallback
+            logger.error(f"Career model warmup failed: {e}")
+
+
+def should_warm_models():
+    """Only warm models in serving processes, not during migrate, collectstatic, tests, etc."""
+    if os.environ.get('WARM_ML_MODELS', '1') == '0':
+        return False
+    if 'runserver' in sys.argv:
+        # The autoreloader parent process never serves requests
+        return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in sys.argv
+    return os.path.basename(sys.argv[0]) in SERVER_COMMANDS
@@ -0,0 +1,15 @@
+"""
+Version stamps for cached values derived from a model's rows
+"""
+import time
+from django.core.cache import cache
+
+
+def get_count_version(label):
+    """Current version stamp for counts cached over a model, 0 before the first write"""
+    return cache.get(f"count_version:{label}", 0)
+
+
+def bump_count_version(label):
+    """Invalidate every count cached over a model by moving its version stamp"""
+    cache.set(f"count_version:{label}", time.time_ns(), None)
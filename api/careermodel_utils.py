@@ -3,22 +3,88 @@ import joblib
 import pandas as pd
 import numpy as np
 import string
+import threading
+from functools import lru_cache
 from django.conf import settings
-from django.core.cache import cache
 import logging
 from typing import Dict, List, Any, Optional, Tuple
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
 
 logger = logging.getLogger(__name__)
 
+# Career artifacts are kept in process memory rather than Django's cache, which would
+# re-pickle the DataFrames on every get/set and shares the 'ml_models' key with MLPredictor
+_career_model_cache = {}
+
+# Columns of hybrid_df read by the recommender and RecommendationView
+HYBRID_DF_COLUMNS = [
+    'Sri_Lankan_Occupation', 'Number_of_Vacancies', 'ONET_SOC_Code',
+    'ONET_Title', 'Title', 'Skills', 'Abilities'
+]
+
+def optimize_hybrid_df_dtypes(hybrid_df: pd.DataFrame) -> pd.DataFrame:
+    """Store SOC codes as a category and vacancy counts as 32-bit numbers to cut bytes scanned per query"""
+    if hybrid_df['ONET_SOC_Code'].dtype.name != 'category':
+        hybrid_df['ONET_SOC_Code'] = hybrid_df['ONET_SOC_Code'].astype('category')
+    vacancies = hybrid_df['Number_of_Vacancies']
+    vacancies_dtype = 'float32' if vacancies.isna().any() else 'int32'
+    if vacancies.dtype != vacancies_dtype:
+        hybrid_df['Number_of_Vacancies'] = vacancies.astype(vacancies_dtype)
+    return hybrid_df
+
+def ensure_combined_text(occupation_df: pd.DataFrame) -> pd.DataFrame:
+    """Add the 'Title Description' corpus column used for TF-IDF once, instead of per request"""
+    if 'combined_text' not in occupation_df.columns:
+        occupation_df['combined_text'] = occupation_df['Title'].str.cat(occupation_df['Description'], sep=' ')
+    return occupation_df
+
+# Translation table stripping punctuation from degree program text
+_PUNCT_TABLE = str.maketrans('', '', string.punctuation)
+
+# The O*NET TF-IDF matrix is stored as raw CSR component arrays so it can be memory-mapped
+OCCUPATION_TFIDF_COMPONENTS = ('data', 'indices', 'indptr', 'shape')
+
+def get_occupation_tfidf_paths(model_path: str) -> Dict[str, str]:
+    """Paths of the .npy files holding each CSR component of the occupation TF-IDF matrix"""
+    return {
+        name: os.path.join(model_path, f'occupation_tfidf_matrix_{name}.npy')
+        for name in OCCUPATION_TFIDF_COMPONENTS
+    }
+
+def save_occupation_tfidf_matrix(matrix, model_path: str) -> None:
+    """Persist a sparse TF-IDF matrix as uncompressed CSR component arrays"""
+    matrix = sparse.csr_matrix(matrix)
+    paths = get_occupation_tfidf_paths(model_path)
+    np.save(paths['data'], matrix.data)
+    np.save(paths['indices'], matrix.indices)
+    np.save(paths['indptr'], matrix.indptr)
+    np.save(paths['shape'], np.array(matrix.shape))
+
+def load_occupation_tfidf_matrix(model_path: str):
+    """Rebuild the occupation TF-IDF matrix from memory-mapped component arrays, or None if absent"""
+    paths = get_occupation_tfidf_paths(model_path)
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    return sparse.csr_matrix(
+        (
+            np.load(paths['data'], mmap_mode='r'),
+            np.load(paths['indices'], mmap_mode='r'),
+            np.load(paths['indptr'], mmap_mode='r'),
+        ),
+        shape=tuple(np.load(paths['shape']))
+    )
+
 class CareerPredictor:
     def __init__(self):
         self.hybrid_df = None
+        self.hybrid_soc_index = None
         self.occupation_df = None
         self.tfidf_vectorizer = None
+        self.occupation_tfidf_matrix = None
         self.model_path = os.path.join(settings.BASE_DIR, 'api','careermodel')
         self.models_loaded = False
-        self._loading_lock = False  # Simple flag to prevent concurrent loading
+        self._loading_lock = threading.Lock()  # Serialises concurrent first loads
         
         # Don't load models immediately - use lazy loading instead
         logger.info(f"CareerPredictor initialized with lazy loading. Models will be loaded on first use.")
@@ -26,21 +92,26 @@ class CareerPredictor:
     def load_models(self) -> None:
         """Load trained models and encoders with improved error handling"""
         try:
-            # Check if models are cached
-            cached_models = cache.get('ml_models')
+            # Check if models are cached in this process
+            cached_models = _career_model_cache.get('career_models')
             if cached_models:
                 self.hybrid_df = cached_models.get('hybrid_df')
                 self.occupation_df = cached_models.get('occupation_df')
                 self.tfidf_vectorizer = cached_models.get('tfidf_vectorizer')
+                self.occupation_tfidf_matrix = cached_models.get('occupation_tfidf_matrix')
+                self.hybrid_soc_index = cached_models.get('hybrid_soc_index')
                 
                 # Only use cache if all models are actually loaded
-                if self.hybrid_df is not None and self.occupation_df is not None and self.tfidf_vectorizer is not None:
+                if (self.hybrid_df is not None and self.occupation_df is not None and
+                        self.tfidf_vectorizer is not None and self.occupation_tfidf_matrix is not None):
+                    if self.hybrid_soc_index is None:
+                        self._build_hybrid_soc_index()
                     self.models_loaded = True
                     logger.info("Models loaded from cache")
                     return
                 else:
                     logger.warning("Cached models are invalid, clearing cache and loading fresh")
-                    cache.delete('ml_models')
+                    _career_model_cache.pop('career_models', None)
             
             # Create model directory if it doesn't exist
             if not os.path.exists(self.model_path):
@@ -51,14 +122,17 @@ class CareerPredictor:
             self._load_hybrid_df()
             self._load_occupation_df()
             self._load_tfidf_vectorizer()
+            self._load_occupation_tfidf_matrix()
             
-            # Cache models for 1 hour if at least one model was loaded
+            # Cache models for the lifetime of the process if at least one model was loaded
             if self.hybrid_df is not None or self.occupation_df is not None:
-                cache.set('ml_models', {
+                _career_model_cache['career_models'] = {
                     'hybrid_df': self.hybrid_df,
                     'occupation_df': self.occupation_df,
                     'tfidf_vectorizer': self.tfidf_vectorizer,
-                }, 3600)
+                    'occupation_tfidf_matrix': self.occupation_tfidf_matrix,
+                    'hybrid_soc_index': self.hybrid_soc_index,
+                }
                 self.models_loaded = True
                 logger.info("Models loaded and cached successfully")
             else:
@@ -74,17 +148,25 @@ class CareerPredictor:
         hybrid_df_path = os.path.join(self.model_path, 'hybrid_df.pkl')
         if os.path.exists(hybrid_df_path):
             try:
-                self.hybrid_df = joblib.load(hybrid_df_path)
+                self.hybrid_df = optimize_hybrid_df_dtypes(joblib.load(hybrid_df_path, mmap_mode='r'))
                 logger.info("hybrid_df model loaded successfully")
+                self._build_hybrid_soc_index()
             except Exception as e:
                 logger.error(f"Error loading hybrid_df: {str(e)}")
                 self.hybrid_df = None
+    def _build_hybrid_soc_index(self) -> None:
+        """Map each ONET_SOC_Code to its row positions in hybrid_df"""
+        try:
+            self.hybrid_soc_index = self.hybrid_df.groupby('ONET_SOC_Code', observed=True).indices
+        except Exception as e:
+            logger.error(f"Error building hybrid_df SOC index: {str(e)}")
+            self.hybrid_soc_index = None
     def _load_occupation_df(self) -> None:
         """Load occupation_df model"""
         occupation_df_path = os.path.join(self.model_path, 'occupation_df.pkl')
         if os.path.exists(occupation_df_path):
             try:
-                self.occupation_df = joblib.load(occupation_df_path)
+                self.occupation_df = ensure_combined_text(joblib.load(occupation_df_path, mmap_mode='r'))
                 logger.info("occupation_df loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading occupation_df: {str(e)}")
@@ -94,29 +176,41 @@ class CareerPredictor:
         tfidf_vectorizer_path = os.path.join(self.model_path, 'tfidf_vectorizer.pkl')
         if os.path.exists(tfidf_vectorizer_path):
             try:
-                self.tfidf_vectorizer = joblib.load(tfidf_vectorizer_path)
+                self.tfidf_vectorizer = joblib.load(tfidf_vectorizer_path, mmap_mode='r')
                 logger.info("tfidf_vectorizer model loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading tfidf_vectorizer: {str(e)}")
                 self.tfidf_vectorizer = None
+    def _load_occupation_tfidf_matrix(self) -> None:
+        """Load the precomputed O*NET TF-IDF matrix, building and saving it on first use"""
+        try:
+            self.occupation_tfidf_matrix = load_occupation_tfidf_matrix(self.model_path)
+            if self.occupation_tfidf_matrix is not None:
+                logger.info("occupation_tfidf_matrix loaded successfully")
+                return
+        except Exception as e:
+            logger.error(f"Error loading occupation_tfidf_matrix: {str(e)}")
+            self.occupation_tfidf_matrix = None
+        
+        if self.tfidf_vectorizer is None or self.occupation_df is None:
+            return
+        try:
+            self.occupation_tfidf_matrix = self.tfidf_vectorizer.transform(self.occupation_df['combined_text'])
+            save_occupation_tfidf_matrix(self.occupation_tfidf_matrix, self.model_path)
+            logger.info("occupation_tfidf_matrix computed and saved successfully")
+        except Exception as e:
+            logger.error(f"Error building occupation_tfidf_matrix: {str(e)}")
+            self.occupation_tfidf_matrix = None
     def _ensure_models_loaded(self) -> bool:
         """Ensure models are loaded using lazy loading pattern"""
         if self.models_loaded:
             return True
             
-        # Prevent concurrent loading attempts
-        if self._loading_lock:
-            logger.info("Career models are currently being loaded by another thread, waiting...")
-            import time
-            for _ in range(30):  # Wait up to 3 seconds
-                time.sleep(0.1)
-                if self.models_loaded:
-                    return True
-            logger.warning("Timeout waiting for career models to load")
-            return False
+        # Double-checked locking: only one thread loads, the rest wait and reuse the result
+        with self._loading_lock:
+            if self.models_loaded:
+                return True
             
-        try:
-            self._loading_lock = True
             logger.info("Loading career models on-demand...")
             self.load_models()
             
@@ -125,15 +219,29 @@ class CareerPredictor:
             else:
                 logger.error("Failed to load career models")
             return self.models_loaded
-            
-        finally:
-            self._loading_lock = False
     
     def _validate_models_loaded(self) -> bool:
         """Check if models are properly loaded"""
         return self._ensure_models_loaded()
 
-def recommend_careers_logic(degree_program, hybrid_df, occupation_tfidf_matrix, tfidf_vectorizer, occupation_df, N=30, weight_similarity=0.6, weight_vacancies=0.4):
+# Fitted vectorizers by id() so cached degree vectors can be looked up by a hashable key
+_tfidf_vectorizer_registry = {}
+
+def _register_tfidf_vectorizer(tfidf_vectorizer) -> int:
+    """Register the active vectorizer, dropping cached vectors from any previous one"""
+    vec_id = id(tfidf_vectorizer)
+    if vec_id not in _tfidf_vectorizer_registry:
+        _tfidf_vectorizer_registry.clear()
+        _cached_degree_tfidf.cache_clear()
+        _tfidf_vectorizer_registry[vec_id] = tfidf_vectorizer
+    return vec_id
+
+@lru_cache(maxsize=1024)
+def _cached_degree_tfidf(cleaned_degree_program: str, vec_id: int):
+    """TF-IDF vector for a cleaned degree string; degree names repeat heavily across users"""
+    return _tfidf_vectorizer_registry[vec_id].transform([cleaned_degree_program])
+
+def recommend_careers_logic(degree_program, hybrid_df, occupation_tfidf_matrix, tfidf_vectorizer, occupation_df, N=30, weight_similarity=0.6, weight_vacancies=0.4, hybrid_soc_index=None):
     """
     Recommends careers based on a student's degree or program, considering
     similarity to O*NET occupations and Sri Lankan vacancy numbers.
@@ -148,6 +256,8 @@ def recommend_careers_logic(degree_program, hybrid_df, occupation_tfidf_matrix,
         N (int): The number of top similar O*NET occupations to consider for re-ranking.
         weight_similarity (float): The weight given to the similarity score in the combined score.
         weight_vacancies (float): The weight given to the normalized vacancy numbers in the combined score.
+        hybrid_soc_index (dict): Optional mapping of ONET_SOC_Code to row positions in hybrid_df,
+                                 used to avoid scanning the whole frame.
 
 
     Returns:
@@ -157,75 +267,79 @@ def recommend_careers_logic(degree_program, hybrid_df, occupation_tfidf_matrix,
         logger.error("Model components not loaded. Cannot provide recommendations.")
         return []
 
-    # Ensure 'combined_text' exists in occupation_df for TF-IDF transformation
-    if 'combined_text' not in occupation_df.columns:
-        occupation_df['combined_text'] = occupation_df['Title'] + ' ' + occupation_df['Description']
-
 
     # Preprocess the input degree/program text
-    cleaned_degree_program = degree_program.lower()
-    cleaned_degree_program = cleaned_degree_program.translate(str.maketrans('', '', string.punctuation))
+    cleaned_degree_program = degree_program.lower().translate(_PUNCT_TABLE)
 
     # Transform the preprocessed degree/program text into a TF-IDF vector
     try:
-        degree_program_tfidf = tfidf_vectorizer.transform([cleaned_degree_program])
+        vec_id = _register_tfidf_vectorizer(tfidf_vectorizer)
+        degree_program_tfidf = _cached_degree_tfidf(cleaned_degree_program, vec_id)
     except ValueError as e:
         print(f"Error transforming degree program text: {e}")
         return []
 
 
-    # Calculate the cosine similarity
-    # Need to recreate occupation_tfidf_matrix as it wasn't saved
-    occupation_tfidf_matrix = tfidf_vectorizer.transform(occupation_df['combined_text'])
+    # Calculate the cosine similarity against the precomputed O*NET matrix
+    if occupation_tfidf_matrix is None:
+        logger.warning("occupation_tfidf_matrix not provided, transforming occupation corpus on the fly")
+        occupation_tfidf_matrix = tfidf_vectorizer.transform(occupation_df['combined_text'])
     cosine_sim_degree = cosine_similarity(degree_program_tfidf, occupation_tfidf_matrix).flatten()
 
-    # Get the similarity scores and sort the O*NET occupations
-    sim_scores_degree = list(enumerate(cosine_sim_degree))
-    sim_scores_degree = sorted(sim_scores_degree, key=lambda x: x[1], reverse=True)
-
-    # Select the top N most similar O*NET occupations
-    top_N_indices = [x[0] for x in sim_scores_degree[0:N]]
-    top_N_onet_occupations = occupation_df.iloc[top_N_indices].copy()
-    top_N_onet_occupations['Similarity_Score_Degree'] = [sim_scores_degree[i][1] for i in range(N)]
-
-    # Find corresponding entries in the hybrid_df and implement re-ranking
-    recommended_careers = []
-    # Get all unique ONET_SOC_Codes from the top N ONET occupations
-    top_n_onet_soc_codes = top_N_onet_occupations['O*NET-SOC Code'].tolist()
-
-    # Filter hybrid_df to only include entries for the top N ONET SOC codes
-    filtered_hybrid_df = hybrid_df[hybrid_df['ONET_SOC_Code'].isin(top_n_onet_soc_codes)].copy()
-
-
-    if not filtered_hybrid_df.empty:
-        # Normalize vacancy numbers for better scaling in the combined score
-        max_vacancies = filtered_hybrid_df['Number_of_Vacancies'].max()
-        if max_vacancies > 0:
-             filtered_hybrid_df['Normalized_Vacancies'] = filtered_hybrid_df['Number_of_Vacancies'] / max_vacancies
-        else:
-             filtered_hybrid_df['Normalized_Vacancies'] = 0
+    # Select the top N most similar O*NET occupations without sorting the full score array
+    N = min(N, len(cosine_sim_degree))
+    if N <= 0:
+        return []
+    top_N_indices = np.argpartition(cosine_sim_degree, -N)[-N:]
+    top_N_indices = top_N_indices[np.argsort(-cosine_sim_degree[top_N_indices])]
+    top_N_similarities = cosine_sim_degree[top_N_indices]
+    top_n_onet_soc_codes = occupation_df['O*NET-SOC Code'].values[top_N_indices]
 
+    # Map each of the top N ONET SOC codes to its degree similarity (best score wins on repeats)
+    sim_map = {}
+    for code, score in zip(top_n_onet_soc_codes, top_N_similarities):
+        sim_map.setdefault(code, score)
 
-        # Merge with top_N_onet_occupations to get the degree similarity score for re-ranking
-        re_ranking_df = pd.merge(
-            filtered_hybrid_df,
-            top_N_onet_occupations[['O*NET-SOC Code', 'Similarity_Score_Degree']],
-            left_on='ONET_SOC_Code',
-            right_on='O*NET-SOC Code',
-            how='inner'
-        )
+    # Find the hybrid_df rows for the top N ONET SOC codes
+    if hybrid_soc_index is not None:
+        row_positions = [hybrid_soc_index[code] for code in sim_map if code in hybrid_soc_index]
+        row_positions = np.unique(np.concatenate(row_positions)) if row_positions else np.array([], dtype=np.intp)
+    else:
+        row_positions = np.flatnonzero(hybrid_df['ONET_SOC_Code'].isin(list(sim_map)).values)
 
-        # Calculate combined score - considering the similarity from degree to ONET
-        # and the normalized vacancies from the hybrid link
-        re_ranking_df['Combined_Score'] = (weight_similarity * re_ranking_df['Similarity_Score_Degree']) + (weight_vacancies * re_ranking_df['Normalized_Vacancies'])
+    if len(row_positions) == 0:
+        return []
 
+    # Re-rank on raw arrays for the candidate rows; only the final top 10 become a DataFrame
+    vacancies = np.asarray(hybrid_df['Number_of_Vacancies'].values[row_positions], dtype=float)
+    soc_codes = np.asarray(hybrid_df['ONET_SOC_Code'].values[row_positions])
 
-        # Sort by combined score
-        recommended_careers = re_ranking_df.sort_values(by='Combined_Score', ascending=False).to_dict('records')
+    # Normalize vacancy numbers for better scaling in the combined score; unknown (NaN)
+    # vacancies stay NaN, like pandas' skipna max and division
+    known_vacancies = vacancies[~np.isnan(vacancies)]
+    max_vacancies = known_vacancies.max() if known_vacancies.size else 0
+    if max_vacancies > 0:
+        normalized_vacancies = vacancies / max_vacancies
+    else:
+        normalized_vacancies = np.zeros_like(vacancies)
 
+    # Calculate combined score - considering the similarity from degree to ONET
+    # and the normalized vacancies from the hybrid link
+    similarities = np.array([sim_map[code] for code in soc_codes], dtype=float)
+    combined_scores = weight_similarity * similarities + weight_vacancies * normalized_vacancies
 
-    # Return the top recommendations (e.g., top 10)
-    return recommended_careers[:10]
+    # Return the top recommendations (top 10), best first; NaN scores rank last
+    ranking_scores = np.where(np.isnan(combined_scores), -np.inf, combined_scores)
+    top_k = min(10, len(ranking_scores))
+    best = np.argpartition(-ranking_scores, top_k - 1)[:top_k]
+    best = best[np.argsort(-ranking_scores[best], kind='stable')]
+    recommended_careers = hybrid_df.iloc[row_positions[best]].assign(**{
+        'Normalized_Vacancies': normalized_vacancies[best],
+        'O*NET-SOC Code': soc_codes[best],
+        'Similarity_Score_Degree': similarities[best],
+        'Combined_Score': combined_scores[best],
+    })
+    return recommended_careers.to_dict('records')
 
 # Global variable to hold the lazy-loaded career predictor instance
 career_predictor_instance = None
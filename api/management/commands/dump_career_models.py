@@ -0,0 +1,50 @@
+import os
+import joblib
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.careermodel_utils import (
+    HYBRID_DF_COLUMNS, ensure_combined_text, optimize_hybrid_df_dtypes, save_occupation_tfidf_matrix
+)
+
+
+class Command(BaseCommand):
+    help = 'Re-save career model artifacts uncompressed with pickle protocol 5 so they can be memory-mapped'
+
+    ARTIFACTS = ['hybrid_df.pkl', 'occupation_df.pkl', 'tfidf_vectorizer.pkl']
+
+    def handle(self, *args, **options):
+        model_path = os.path.join(settings.BASE_DIR, 'api', 'careermodel')
+        loaded = {}
+
+        for filename in self.ARTIFACTS:
+            path = os.path.join(model_path, filename)
+            if not os.path.exists(path):
+                self.stdout.write(self.style.WARNING(f"Skipping missing artifact: {filename}"))
+                continue
+            try:
+                artifact = joblib.load(path)
+                if filename == 'hybrid_df.pkl':
+                    # Drop columns the recommender never reads and narrow the scanned ones
+                    artifact = artifact[[c for c in artifact.columns if c in HYBRID_DF_COLUMNS]].copy()
+                    artifact = optimize_hybrid_df_dtypes(artifact)
+                elif filename == 'occupation_df.pkl':
+                    # Persist the TF-IDF corpus column so loading never has to build it
+                    artifact = ensure_combined_text(artifact)
+                # mmap_mode only works on uncompressed joblib files
+                joblib.dump(artifact, path, protocol=5, compress=0)
+                loaded[filename] = artifact
+                self.stdout.write(self.style.SUCCESS(f"[OK] Re-saved {filename}"))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"[FAIL] {filename}: {str(e)}"))
+
+        occupation_df = loaded.get('occupation_df.pkl')
+        tfidf_vectorizer = loaded.get('tfidf_vectorizer.pkl')
+        if occupation_df is None or tfidf_vectorizer is None:
+            self.stdout.write(self.style.WARNING("occupation_df or tfidf_vectorizer unavailable, TF-IDF matrix not rebuilt"))
+            return
+
+        try:
+            save_occupation_tfidf_matrix(tfidf_vectorizer.transform(occupation_df['combined_text']), model_path)
+            self.stdout.write(self.style.SUCCESS("[OK] Saved occupation TF-IDF matrix components"))
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"[FAIL] occupation TF-IDF matrix: {str(e)}"))
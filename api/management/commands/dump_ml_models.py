@@ -0,0 +1,35 @@
+import os
+import joblib
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Re-save admission model artifacts uncompressed with pickle protocol 5 so they can be memory-mapped'
+
+    ARTIFACTS = [
+        'regressor.pkl', 'classifier.pkl', 'classifier_encoder.pkl',
+        'feature_encoder.pkl', 'valid_courses_map.pkl'
+    ]
+
+    ENCODERS = ['classifier_encoder.pkl', 'feature_encoder.pkl']
+
+    def handle(self, *args, **options):
+        model_path = os.path.join(settings.BASE_DIR, 'api', 'ml_model')
+
+        for filename in self.ARTIFACTS:
+            path = os.path.join(model_path, filename)
+            if not os.path.exists(path):
+                self.stdout.write(self.style.WARNING(f"Skipping missing artifact: {filename}"))
+                continue
+            try:
+                artifact = joblib.load(path)
+                if filename in self.ENCODERS and getattr(artifact, 'dtype', None) is not None:
+                    # Emit float32 one-hot columns, matching the float32 feature rows built in ml_utils
+                    artifact.dtype = np.float32
+                # mmap_mode only works on uncompressed joblib files
+                joblib.dump(artifact, path, protocol=5, compress=0)
+                self.stdout.write(self.style.SUCCESS(f"[OK] Re-saved {filename}"))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"[FAIL] {filename}: {str(e)}"))
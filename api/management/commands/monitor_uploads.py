@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from api.utils import process_stuck_uploads_automatically
-import time
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,18 +40,23 @@ class Command(BaseCommand):
         if daemon_mode:
             self.stdout.write("Running in daemon mode - press Ctrl+C to stop")
             try:
-                while True:
-                    self.check_and_process_uploads(max_age)
-                    time.sleep(interval)
+                asyncio.run(self.monitor(interval, max_age))
             except KeyboardInterrupt:
                 self.stdout.write("\nMonitoring stopped by user")
         else:
-            self.check_and_process_uploads(max_age)
+            asyncio.run(self.check_and_process_uploads(max_age))
 
-    def check_and_process_uploads(self, max_age_hours):
+    async def monitor(self, interval, max_age_hours):
+        """Check for stuck uploads every interval seconds without blocking the event loop"""
+        while True:
+            await self.check_and_process_uploads(max_age_hours)
+            await asyncio.sleep(interval)
+
+    async def check_and_process_uploads(self, max_age_hours):
         """Check for stuck uploads and process them"""
         try:
-            processed_count = process_stuck_uploads_automatically(max_age_hours)
+            # ORM queries and PDF processing are synchronous, so run them off the event loop
+            processed_count = await asyncio.to_thread(process_stuck_uploads_automatically, max_age_hours)
             
             if processed_count > 0:
                 self.stdout.write(
@@ -1,8 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.core.management.base import BaseCommand
+from django.db import connection
 from django.utils import timezone
 from datetime import timedelta
 from api.models import AdminUpload
-from api.tasks import process_pdf_and_create_vectorstore
+from api.tasks import activate_upload, process_pdf_and_create_vectorstore
 
 
 class Command(BaseCommand):
@@ -20,47 +22,84 @@ class Command(BaseCommand):
             action='store_true',
             help='Process all pending uploads regardless of time'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of uploads to process in parallel (default: 4)'
+        )
 
     def handle(self, *args, **options):
         hours_threshold = options['hours']
         force_all = options['force_all']
+        workers = max(1, options['workers'])
         
-        # Find stuck uploads
+        # Find stuck uploads (only the fields read below)
         if force_all:
             stuck_uploads = AdminUpload.objects.filter(
                 processing_status__in=['pending', 'processing']
             )
-            self.stdout.write(f"Processing all {stuck_uploads.count()} pending/processing uploads...")
         else:
             cutoff_time = timezone.now() - timedelta(hours=hours_threshold)
             stuck_uploads = AdminUpload.objects.filter(
                 processing_status__in=['pending', 'processing'],
                 uploaded_at__lt=cutoff_time
             )
-            self.stdout.write(f"Processing {stuck_uploads.count()} uploads stuck for more than {hours_threshold} hours...")
+        stuck_uploads = stuck_uploads.only('id', 'original_filename')
+        total_stuck = stuck_uploads.count()
+
+        if force_all:
+            self.stdout.write(f"Processing all {total_stuck} pending/processing uploads...")
+        else:
+            self.stdout.write(f"Processing {total_stuck} uploads stuck for more than {hours_threshold} hours...")
 
-        if not stuck_uploads.exists():
+        if not total_stuck:
             self.stdout.write(self.style.SUCCESS("No stuck uploads found."))
             return
 
         processed_count = 0
-        failed_count = 0
+        processed_ids = []
+        failed_ids = []
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for upload in stuck_uploads.iterator(chunk_size=200):
+                self.stdout.write(f"Processing upload {upload.id}: {upload.original_filename}")
+                futures[executor.submit(self._process_upload, upload.id)] = upload
+
+            for future in as_completed(futures):
+                upload = futures[future]
+                try:
+                    result = future.result()
+                    self.stdout.write(self.style.SUCCESS(f"[OK] Upload {upload.id} processed successfully: {result}"))
+                    processed_count += 1
+                    processed_ids.append(upload.id)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"[FAIL] Upload {upload.id} failed: {str(e)}"))
+                    failed_ids.append(upload.id)
 
-        for upload in stuck_uploads:
-            self.stdout.write(f"Processing upload {upload.id}: {upload.original_filename}")
-            
-            try:
-                # Process synchronously
-                result = process_pdf_and_create_vectorstore(upload.id)
-                self.stdout.write(self.style.SUCCESS(f"[OK] Upload {upload.id} processed successfully: {result}"))
-                processed_count += 1
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"[FAIL] Upload {upload.id} failed: {str(e)}"))
-                # Mark as failed
-                upload.processing_status = 'failed'
-                upload.save()
-                failed_count += 1
+        # Mark all failures in a single UPDATE
+        if failed_ids:
+            AdminUpload.objects.filter(id__in=failed_ids).update(processing_status='failed')
+
+        # Workers finish in any order, so the handbook is activated once the pool has
+        # drained: the newest upload of this batch that actually completed
+        newest_id = AdminUpload.objects.filter(
+            id__in=processed_ids, processing_status='completed'
+        ).order_by('-uploaded_at').values_list('id', flat=True).first()
+        if newest_id is not None:
+            activate_upload(newest_id)
+            self.stdout.write(f"Activated upload {newest_id} as the handbook")
 
         self.stdout.write(self.style.SUCCESS(
-            f"\nProcessing complete: {processed_count} successful, {failed_count} failed"
+            f"\nProcessing complete: {processed_count} successful, {len(failed_ids)} failed"
         ))
+
+    def _process_upload(self, upload_id):
+        """Process one upload synchronously in a worker thread"""
+        try:
+            # Activation happens once for the whole batch in handle()
+            return process_pdf_and_create_vectorstore(upload_id, activate=False)
+        finally:
+            # Each worker thread opens its own DB connection; release it when done
+            connection.close()
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_careersession_degree_program'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='predictionsession',
+            index=models.Index(fields=['student', '-predicted_at'], name='predsession_student_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='predictionsession',
+            index=models.Index(fields=['student', 'active', '-predicted_at'], name='predsession_stu_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedprediction',
+            index=models.Index(fields=['student', '-saved_at'], name='savedpred_student_time_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-15 10:30
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_prediction_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='predictionsession',
+            name='year',
+            field=models.IntegerField(default=2024, validators=[django.core.validators.MinValueValidator(1900, 'Year must be between 1900 and 2100'), django.core.validators.MaxValueValidator(2100, 'Year must be between 1900 and 2100')]),
+        ),
+        migrations.AlterField(
+            model_name='predictionsession',
+            name='z_score',
+            field=models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0, 'Z-score must be between 0 and 3'), django.core.validators.MaxValueValidator(3, 'Z-score must be between 0 and 3')]),
+        ),
+        migrations.AlterField(
+            model_name='savedprediction',
+            name='predicted_cutoff',
+            field=models.FloatField(default=0.0, help_text='Predicted Z-score cutoff', validators=[django.core.validators.MinValueValidator(0, 'Predicted cutoff cannot be negative')]),
+        ),
+        migrations.AlterField(
+            model_name='savedprediction',
+            name='predicted_probability',
+            field=models.FloatField(default=0.0, help_text='Probability of selection (0-1)', validators=[django.core.validators.MinValueValidator(0, 'Predicted probability must be between 0 and 1'), django.core.validators.MaxValueValidator(1, 'Predicted probability must be between 0 and 1')]),
+        ),
+        migrations.AlterField(
+            model_name='savedcareerprediction',
+            name='match_score',
+            field=models.FloatField(default=0.0, help_text='Match score between 0 and 1', validators=[django.core.validators.MinValueValidator(0, 'Match score must be between 0 and 1'), django.core.validators.MaxValueValidator(1, 'Match score must be between 0 and 1')]),
+        ),
+    ]
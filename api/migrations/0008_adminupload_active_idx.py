@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-15 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_range_validators'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminupload',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-uploaded_at'], name='adminupload_active_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-15 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_adminupload_active_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savedprediction',
+            name='probability_percentage',
+            field=models.GeneratedField(db_persist=True, expression=models.F('predicted_probability') * 100, output_field=models.FloatField()),
+        ),
+        migrations.AddField(
+            model_name='savedcareerprediction',
+            name='match_percentage',
+            field=models.GeneratedField(db_persist=True, expression=models.F('match_score') * 100, output_field=models.FloatField()),
+        ),
+    ]
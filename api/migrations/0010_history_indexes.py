@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-15 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_generated_percentages'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chathistory',
+            index=models.Index(fields=['student', 'active', '-asked_at'], name='chathistory_stu_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careersession',
+            index=models.Index(fields=['student', 'active', '-created_at'], name='careersession_stu_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='savedcareerprediction',
+            index=models.Index(fields=['student', '-saved_at'], name='savedcareer_student_time_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.3 on 2026-10-15 15:00
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Concat, Trim
+
+SNAPSHOT_MODELS = ['predictionsession', 'savedprediction', 'careersession', 'savedcareerprediction']
+
+
+def copy_student_details(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    students = User.objects.filter(pk=OuterRef('student_id'))
+    full_names = students.annotate(
+        full_name=Trim(Concat('first_name', Value(' '), 'last_name', output_field=models.CharField()))
+    )
+    for model_name in SNAPSHOT_MODELS:
+        apps.get_model('api', model_name).objects.update(
+            student_email=Subquery(students.values('email')[:1]),
+            student_full_name=Subquery(full_names.values('full_name')[:1]),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictionsession',
+            name='student_email',
+            field=models.EmailField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='predictionsession',
+            name='student_full_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=301),
+        ),
+        migrations.AddField(
+            model_name='savedprediction',
+            name='student_email',
+            field=models.EmailField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='savedprediction',
+            name='student_full_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=301),
+        ),
+        migrations.AddField(
+            model_name='careersession',
+            name='student_email',
+            field=models.EmailField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='careersession',
+            name='student_full_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=301),
+        ),
+        migrations.AddField(
+            model_name='savedcareerprediction',
+            name='student_email',
+            field=models.EmailField(blank=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='savedcareerprediction',
+            name='student_full_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=301),
+        ),
+        migrations.RunPython(copy_student_details, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-15 16:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_student_snapshots'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='chathistory',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('question'), name='gin_trgm_ops'),
+                name='chathistory_question_trgm',
+            ),
+        ),
+    ]
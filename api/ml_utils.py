@@ -1,17 +1,122 @@
 import os
+import sys
+import math
+import time
+import mmap
 import joblib
 import pandas as pd
 import numpy as np
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import logging
 from django.conf import settings
-from django.core.cache import cache
 from typing import Dict, List, Any, Optional, Tuple
+from scipy import sparse
+from .models import PredictionSession
 
 logger = logging.getLogger(__name__)
 
+# Optional treelite GTIL tree inference; sklearn's predict is used when treelite is unavailable
+try:
+    import treelite
+    import treelite.gtil
+    import treelite.sklearn
+except ImportError:
+    treelite = None
+
+# Common stream names mapped to the keys in valid_courses_map
+STREAM_ALIASES = {
+    'physical': 'Physical Science',
+    'biological': 'Biological Science',
+    'biosystems': 'Biosystems Technology',
+    'commerce': 'Commerce',
+    'engineering': 'Engineering Technology',
+    'arts': 'Arts',
+    'other': 'Other'
+}
+
+# Prediction results keyed by their feature tuple; models are frozen for the process
+# lifetime, so entries never go stale and only need a size bound
+PREDICTION_CACHE_MAXSIZE = 8192
+_cutoff_cache = {}
+_probability_cache = {}
+_prediction_cache_lock = threading.Lock()
+
+def _prediction_cache_key(features_dict: Dict[str, Any]) -> Tuple:
+    """Hashable key for a normalized feature dict"""
+    return tuple(sorted(features_dict.items()))
+
+def _store_predictions(prediction_cache: Dict[Tuple, float], items: List[Tuple[Tuple, float]]) -> None:
+    """Add prediction results to a cache, evicting the oldest entries when it is full"""
+    with _prediction_cache_lock:
+        for key, result in items:
+            if key not in prediction_cache and len(prediction_cache) >= PREDICTION_CACHE_MAXSIZE:
+                prediction_cache.pop(next(iter(prediction_cache)))
+            prediction_cache[key] = result
+
+# Lowercase district name -> canonical uppercase name the encoders were trained on
+_DISTRICT_CANONICAL = {district.lower(): sys.intern(district) for district, _ in PredictionSession.DISTRICT_CHOICES}
+
+# Interned stream names, so every row of a batch shares one string object per stream
+_INTERNED_STREAMS = {sys.intern(stream): sys.intern(stream) for stream, _ in PredictionSession.STREAM_CHOICES}
+
+@lru_cache(maxsize=128)
+def canonical_district(district: str) -> str:
+    """Map a district to its canonical uppercase form, falling back to upper() for unknown names"""
+    return _DISTRICT_CANONICAL.get(district.lower(), district.upper())
+
+def load_model_artifact(path: str) -> Any:
+    """Load a joblib artifact with its numpy arrays memory-mapped, asking the kernel to prefetch the file"""
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, 'MADV_WILLNEED'):
+                    mm.madvise(mmap.MADV_WILLNEED)
+        except (ValueError, OSError):
+            # Empty or unmappable files fall through to joblib, which reports the real error
+            pass
+    # mmap_mode is only honored for uncompressed dumps (see the dump_ml_models command)
+    return joblib.load(path, mmap_mode='r')
+
+def assemble_feature_rows(numerical_features: np.ndarray, encoded_features: Any) -> sparse.csr_matrix:
+    """Write numerical values and one-hot entries straight into one float32 CSR matrix, numerical columns first"""
+    encoded = sparse.csr_matrix(encoded_features)
+    n_rows, n_numerical = numerical_features.shape
+    indptr = np.zeros(n_rows + 1, dtype=np.int32)
+    np.cumsum(np.diff(encoded.indptr) + n_numerical, out=indptr[1:])
+    
+    # Each row starts with its numerical entries, followed by the encoder's one-hot entries
+    numerical_positions = (indptr[:-1, None] + np.arange(n_numerical)).ravel()
+    one_hot_mask = np.ones(indptr[-1], dtype=bool)
+    one_hot_mask[numerical_positions] = False
+    
+    data = np.empty(indptr[-1], dtype=np.float32)
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    data[numerical_positions] = numerical_features.ravel()
+    indices[numerical_positions] = np.tile(np.arange(n_numerical), n_rows)
+    data[one_hot_mask] = encoded.data
+    indices[one_hot_mask] = encoded.indices + n_numerical
+    return sparse.csr_matrix((data, indices, indptr), shape=(n_rows, n_numerical + encoded.shape[1]))
+
 class MLPredictor:
+    # Fixed attribute layout for the process-wide predictor; no per-instance __dict__
+    __slots__ = (
+        'regressor', 'classifier', 'classifier_encoder', 'feature_encoder',
+        'valid_courses_map', 'model_path', 'models_loaded',
+        '_precomputed_pairs', '_university_count', '_stream_lookup',
+        '_gtil_regressor', '_gtil_classifier', '_model_info'
+    )
+
+    # Loaded predictor whose state every instance in this process shares; models never
+    # change during a process's lifetime, so there is nothing to invalidate
+    _SHARED = None
+
     def __init__(self):
+        if MLPredictor._SHARED is not None:
+            for name in MLPredictor.__slots__:
+                setattr(self, name, getattr(MLPredictor._SHARED, name))
+            return
         self.regressor = None
         self.classifier = None
         self.classifier_encoder = None
@@ -19,31 +124,19 @@ class MLPredictor:
         self.valid_courses_map = None
         self.model_path = os.path.join(settings.BASE_DIR, 'api', 'ml_model')
         self.models_loaded = False
+        self._precomputed_pairs = {}
+        self._university_count = 0
+        self._stream_lookup = {}
+        self._gtil_regressor = None
+        self._gtil_classifier = None
+        self._model_info = None
         self.load_models()
     
     def load_models(self) -> None:
         """Load trained models and encoders with improved error handling"""
+        # Model info is rebuilt lazily from whatever this attempt ends up loading
+        self._model_info = None
         try:
-            # Check if models are cached
-            cached_models = cache.get('ml_models')
-            if cached_models:
-                self.regressor = cached_models.get('regressor')
-                self.classifier = cached_models.get('classifier')
-                self.classifier_encoder = cached_models.get('classifier_encoder')
-                self.feature_encoder = cached_models.get('feature_encoder')
-                self.valid_courses_map = cached_models.get('valid_courses_map')
-                
-                # Verify all required models are loaded
-                if all([self.regressor, self.classifier, self.classifier_encoder, 
-                       self.feature_encoder, self.valid_courses_map]):
-                    self.models_loaded = True
-                    logger.info("All models loaded successfully from cache")
-                    return
-                else:
-                    logger.warning("Incomplete model cache, loading from disk...")
-                    # Clear the cache if it's incomplete
-                    cache.delete('ml_models')
-            
             # Create model directory if it doesn't exist
             if not os.path.exists(self.model_path):
                 logger.error(f"Model directory does not exist: {self.model_path}")
@@ -52,12 +145,16 @@ class MLPredictor:
                 logger.error(f"Directory contents: {os.listdir(os.path.dirname(self.model_path))}")
                 return
             
-            # Load all models
-            self._load_regressor()
-            self._load_classifier()
-            self._load_classifier_encoder()
-            self._load_feature_encoder()
-            self._load_valid_courses_map()
+            # Load all models in parallel; each file is independent and every loader handles its own errors
+            loaders = [
+                self._load_regressor,
+                self._load_classifier,
+                self._load_classifier_encoder,
+                self._load_feature_encoder,
+                self._load_valid_courses_map
+            ]
+            with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+                list(executor.map(lambda load: load(), loaders))
             
             # Verify all models loaded successfully
             if not all([self.regressor, self.classifier, self.classifier_encoder, 
@@ -71,19 +168,12 @@ class MLPredictor:
                 self.models_loaded = False
                 return
             
-            # Cache models for 1 hour if at least one model was loaded
-            if self.regressor or self.classifier:
-                cache.set('ml_models', {
-                    'regressor': self.regressor,
-                    'classifier': self.classifier,
-                    'classifier_encoder': self.classifier_encoder,
-                    'feature_encoder': self.feature_encoder,
-                    'valid_courses_map': self.valid_courses_map
-                }, 3600)
-                self.models_loaded = True
-                logger.info("Models loaded and cached successfully")
-            else:
-                logger.warning("No models were loaded successfully")
+            self._precompute_course_pairs()
+            self._build_stream_lookup()
+            self._load_tree_interpreters()
+            self.models_loaded = True
+            MLPredictor._SHARED = self
+            logger.info("Models loaded successfully")
             
         except Exception as e:
             logger.error(f"Error loading models: {str(e)}")
@@ -94,7 +184,7 @@ class MLPredictor:
         regressor_path = os.path.join(self.model_path, 'regressor.pkl')
         if os.path.exists(regressor_path):
             try:
-                self.regressor = joblib.load(regressor_path)
+                self.regressor = load_model_artifact(regressor_path)
                 logger.info("Regressor model loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading regressor: {str(e)}")
@@ -105,7 +195,7 @@ class MLPredictor:
         classifier_path = os.path.join(self.model_path, 'classifier.pkl')
         if os.path.exists(classifier_path):
             try:
-                self.classifier = joblib.load(classifier_path)
+                self.classifier = load_model_artifact(classifier_path)
                 logger.info("Classifier model loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading classifier: {str(e)}")
@@ -116,7 +206,7 @@ class MLPredictor:
         encoder_path = os.path.join(self.model_path, 'classifier_encoder.pkl')
         if os.path.exists(encoder_path):
             try:
-                self.classifier_encoder = joblib.load(encoder_path)
+                self.classifier_encoder = load_model_artifact(encoder_path)
                 logger.info("Classifier encoder loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading classifier encoder: {str(e)}")
@@ -127,7 +217,7 @@ class MLPredictor:
         encoder_path = os.path.join(self.model_path, 'feature_encoder.pkl')
         if os.path.exists(encoder_path):
             try:
-                self.feature_encoder = joblib.load(encoder_path)
+                self.feature_encoder = load_model_artifact(encoder_path)
                 logger.info("Feature encoder loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading feature encoder: {str(e)}")
@@ -139,12 +229,116 @@ class MLPredictor:
         courses_map_path = os.path.join(self.model_path, 'valid_courses_map.pkl')
         if os.path.exists(courses_map_path):
             try:
-                self.valid_courses_map = joblib.load(courses_map_path)
+                self.valid_courses_map = load_model_artifact(courses_map_path)
                 logger.info("Valid courses map loaded successfully")
             except Exception as e:
                 logger.error(f"Error loading valid courses map: {str(e)}")
                 self.valid_courses_map = None
     
+    def _precompute_course_pairs(self) -> None:
+        """Build every stream's course-university pairs once; they never change at runtime"""
+        # Index 0 of the feature encoder's categories holds the universities
+        cleaned_universities = []
+        seen = set()
+        for uni in self.feature_encoder.categories_[0]:
+            cleaned_uni = sys.intern(uni.strip())
+            if cleaned_uni and cleaned_uni not in seen:
+                cleaned_universities.append(cleaned_uni)
+                seen.add(cleaned_uni)
+        
+        if not cleaned_universities:
+            logger.warning("No universities found in feature encoder")
+        
+        self._university_count = len(cleaned_universities)
+        self._precomputed_pairs = {
+            stream_key: [
+                {'course_name': course, 'university_name': university}
+                for course in map(sys.intern, courses)
+                for university in cleaned_universities
+            ]
+            for stream_key, courses in self.valid_courses_map.items()
+        }
+    
+    def _build_stream_lookup(self) -> None:
+        """Map every normalized stream name and alias straight to its valid_courses_map key"""
+        self._stream_lookup = dict(STREAM_ALIASES)
+        self._stream_lookup.update({key.lower(): key for key in STREAM_ALIASES.values()})
+        # Keys present in valid_courses_map take precedence over aliases
+        self._stream_lookup.update({key.lower().strip(): key for key in self.valid_courses_map})
+    
+    def _probe_rows(self, limit: int = 64) -> List[Dict[str, Any]]:
+        """A few real course-university rows per stream, used to vet the treelite interpreter"""
+        district = PredictionSession.DISTRICT_CHOICES[0][0]
+        rows = []
+        for stream_key, pairs in self._precomputed_pairs.items():
+            for pair in pairs[:8]:
+                rows.append({
+                    'stream': stream_key, 'district': district, 'year': 2025, 'z_score': 1.0,
+                    'course_name': pair['course_name'], 'university': pair['university_name'],
+                })
+        return rows[:limit]
+    
+    @staticmethod
+    def _gtil_beats_sklearn(model, probe, gtil_predict, sklearn_predict) -> bool:
+        """True when GTIL matches sklearn on the probe rows and runs them faster"""
+        if not np.allclose(gtil_predict(model, probe), sklearn_predict(probe), atol=1e-4):
+            return False
+        started = time.perf_counter()
+        gtil_predict(model, probe)
+        gtil_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        sklearn_predict(probe)
+        sklearn_seconds = time.perf_counter() - started
+        return gtil_seconds < sklearn_seconds
+    
+    def _load_tree_interpreters(self) -> None:
+        """Import the models into treelite's GTIL interpreter, used only where it measures faster than sklearn"""
+        if treelite is None:
+            return
+        
+        probe_rows = self._probe_rows()
+        if not probe_rows:
+            return
+        
+        try:
+            model = treelite.sklearn.import_model(self.regressor)
+            probe = self._encode_features_for_regressor_batch(probe_rows)
+            if self._gtil_beats_sklearn(model, probe, lambda m, x: self._treelite_predict(m, x)[:, 0], self.regressor.predict):
+                self._gtil_regressor = model
+                logger.info("Regressor served by treelite GTIL")
+        except Exception as e:
+            logger.info(f"Regressor not served by treelite, using sklearn: {str(e)}")
+        
+        try:
+            model = treelite.sklearn.import_model(self.classifier)
+            probe = self._encode_features_for_classifier_batch(probe_rows)
+            if self._gtil_beats_sklearn(model, probe, lambda m, x: self._treelite_predict(m, x)[:, -1],
+                                        lambda x: self.classifier.predict_proba(x)[:, 1]):
+                self._gtil_classifier = model
+                logger.info("Classifier served by treelite GTIL")
+        except Exception as e:
+            logger.info(f"Classifier not served by treelite, using sklearn: {str(e)}")
+    
+    @staticmethod
+    def _treelite_predict(model, features) -> np.ndarray:
+        """Run treelite's tree interpreter, flattening its per-target output to one row per input"""
+        # GTIL only takes dense arrays; the densify is part of what the load-time timing measures
+        if sparse.issparse(features):
+            features = features.toarray()
+        return np.asarray(treelite.gtil.predict(model, features)).reshape(features.shape[0], -1)
+    
+    def _predict_cutoffs(self, encoded_features) -> np.ndarray:
+        """Regressor output for encoded rows, through treelite GTIL when it was faster at load"""
+        if self._gtil_regressor is not None:
+            return self._treelite_predict(self._gtil_regressor, encoded_features)[:, 0]
+        return self.regressor.predict(encoded_features)
+    
+    def _predict_probabilities(self, encoded_features) -> np.ndarray:
+        """Positive-class probability for encoded rows, through treelite GTIL when it was faster at load"""
+        if self._gtil_classifier is not None:
+            return self._treelite_predict(self._gtil_classifier, encoded_features)[:, -1]
+        return self.classifier.predict_proba(encoded_features)[:, 1]
+    
     def _ensure_models_loaded(self) -> bool:
         """Ensure models are loaded, loading them if necessary.
         
@@ -158,339 +352,199 @@ class MLPredictor:
         self.load_models()
         return self.models_loaded
 
-    def get_available_courses_for_stream(self, stream: str, limit: int = 100) -> List[Dict[str, str]]:
-        """Get available courses for a given stream
-        
-        Args:
-            stream: The stream to get courses for
-            limit: Maximum number of courses to return
-            
-        Returns:
-            List of dictionaries with course_name and university_name
+    def _validate_models_loaded(self) -> bool:
+        """Check if models are properly loaded"""
+        if not self.models_loaded:
+            logger.error("Models not properly loaded. Please check model files.")
+            return False
+        return True
+    
+    def _encode_features_for_regressor(self, data_dict: Dict[str, Any]) -> sparse.csr_matrix:
         """
-        if not self.valid_courses_map:
-            logger.error("Valid courses map not loaded")
-            return []
-            
-        stream = stream.lower()
-        if stream not in self.valid_courses_map:
-            logger.warning(f"No courses found for stream: {stream}")
-            return []
-            
-        courses = []
-        for course, univs in self.valid_courses_map[stream].items():
-            for univ in univs:
-                courses.append({
-                    'course_name': course,
-                    'university_name': univ
-                })
-                
-                if len(courses) >= limit:
-                    return courses
-                    
-        return courses
-        
-    def get_recommendation_status(self, probability: float) -> str:
-        """Get recommendation status based on probability
+        Encode features for the regressor model.
         
         Args:
-            probability: Probability of selection (0-1)
+            data_dict: Dictionary containing input features
             
         Returns:
-            Recommendation status as string
+            1-row sparse matrix of encoded features
         """
-        if probability >= 0.8:
-            return "High Chance"
-        elif probability >= 0.5:
-            return "Moderate Chance"
-        elif probability >= 0.2:
-            return "Low Chance"
-        else:
-            return "Very Low Chance"
-
-    def predict_cutoff(self, year: int, university: str, course_name: str, district: str, 
-                      stream: str, aptitude_test: bool, all_island_merit: bool) -> float:
+        return self._encode_features_for_regressor_batch([data_dict])
+    
+    def _encode_features_for_classifier(self, data_dict: Dict[str, Any]) -> sparse.csr_matrix:
         """
-        Predict the cutoff Z-score for a given course and university.
+        Encode features for the classifier model.
         
         Args:
-            year: The admission year
-            university: Name of the university
-            course_name: Name of the course
-            district: District of the applicant
-            stream: Stream (e.g., 'Biological Science', 'Physical Science')
-            aptitude_test: Whether the course requires an aptitude test
-            all_island_merit: Whether the application is through all-island merit
+            data_dict: Dictionary containing input features
             
         Returns:
-            Predicted cutoff Z-score
+            1-row sparse matrix of encoded features
         """
+        return self._encode_features_for_classifier_batch([data_dict])
+    
+    def predict_cutoff(self, year: int, university: str, course_name: str, district: str, 
+                      stream: str, aptitude_test: bool, all_island_merit: bool) -> float:
+        """Predict Z-score cutoff using regressor"""
+        return self.predict_cutoff_batch([{
+            'year': year,
+            'university': university,
+            'course_name': course_name,
+            'district': district,
+            'stream': stream,
+            'aptitude_test': aptitude_test,
+            'all_island_merit': all_island_merit
+        }])[0]
+    
+    def predict_selection_probability(self, z_score: float, stream: str, district: str, 
+                                    course_name: str, university: str, aptitude_test: bool, 
+                                    all_island_merit: bool) -> float:
+        """Predict selection probability using classifier"""
+        return self.predict_selection_probability_batch([{
+            'z_score': z_score,
+            'stream': stream,
+            'district': district,
+            'course_name': course_name,
+            'university': university,
+            'aptitude_test': aptitude_test,
+            'all_island_merit': all_island_merit
+        }])[0]
+    
+    def predict_cutoff_batch(self, rows: List[Dict[str, Any]]) -> List[float]:
+        """Predict Z-score cutoffs for many course/university rows with a single regressor call"""
+        # models_loaded is only set once every model and encoder is present
         if not self._validate_models_loaded():
             raise ValueError("Models not properly loaded")
-            
+        
+        if not rows:
+            return []
+        
+        features_dicts = []
+        for row in rows:
+            if not all([row.get('year'), row.get('university'), row.get('course_name'),
+                        row.get('district'), row.get('stream')]):
+                raise ValueError("All input parameters must be provided and non-empty")
+            features_dicts.append({
+                'university': str(row['university']),
+                'course_name': str(row['course_name']),
+                'district': canonical_district(str(row['district'])),
+                'stream': _INTERNED_STREAMS.get(row['stream']) or str(row['stream']),
+                'year': row['year'],
+                'aptitude_test': row.get('aptitude_test', False),
+                'all_island_merit': row.get('all_island_merit', True)
+            })
+        
+        # Only rows not seen before go through the encoder and regressor
+        keys = [_prediction_cache_key(features_dict) for features_dict in features_dicts]
+        results = [_cutoff_cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        
         try:
-            # Prepare input features
-            input_data = {
-                'year': year,
-                'university': university,
-                'course_name': course_name,
-                'district': district,
-                'stream': stream,
-                'aptitude_test': aptitude_test,
-                'all_island_merit': all_island_merit
-            }
-            
-            # Encode features for the regressor
-            features = self._encode_features_for_regressor(input_data)
-            
-            # Make prediction
-            prediction = self.regressor.predict(features)
-            return float(prediction[0])
-            
+            encoded_features = self._encode_features_for_regressor_batch([features_dicts[i] for i in missing])
+            predictions = self._predict_cutoffs(encoded_features)
         except Exception as e:
-            logger.error(f"Error in predict_cutoff: {str(e)}", exc_info=True)
-            raise
-    
-    def predict_selection_probability(self, z_score: float, stream: str, district: str,
-                                    course_name: str, university: str,
-                                    aptitude_test: bool, all_island_merit: bool) -> float:
-        """
-        Predict the probability of selection for a given course and Z-score.
+            logger.error(f"Error during batch prediction: {str(e)}")
+            raise ValueError(f"Prediction failed: {str(e)}")
         
-        Args:
-            z_score: Applicant's Z-score
-            stream: Stream (e.g., 'Biological Science', 'Physical Science')
-            district: District of the applicant
-            course_name: Name of the course
-            university: Name of the university
-            aptitude_test: Whether the course requires an aptitude test
-            all_island_merit: Whether the application is through all-island merit
-            
-        Returns:
-            Probability of selection (0-1)
-        """
+        # Invalid results fall back to the default value
+        for i, prediction in zip(missing, predictions.tolist()):
+            results[i] = prediction if math.isfinite(prediction) else 0.0
+        _store_predictions(_cutoff_cache, [(keys[i], results[i]) for i in missing])
+        return results
+    
+    def predict_selection_probability_batch(self, rows: List[Dict[str, Any]]) -> List[float]:
+        """Predict selection probabilities for many course/university rows with a single classifier call"""
+        # models_loaded is only set once every model and encoder is present
         if not self._validate_models_loaded():
             raise ValueError("Models not properly loaded")
-            
+        
+        if not rows:
+            return []
+        
+        features_dicts = []
+        for row in rows:
+            if row.get('z_score') is None or not all([row.get('stream'), row.get('district'),
+                                                      row.get('course_name'), row.get('university')]):
+                raise ValueError("All input parameters must be provided and non-empty")
+            features_dicts.append({
+                'stream': _INTERNED_STREAMS.get(row['stream']) or str(row['stream']),
+                'district': canonical_district(str(row['district'])),
+                'course_name': str(row['course_name']),
+                'university': str(row['university']),
+                'z_score': row['z_score'],
+                'aptitude_test': row.get('aptitude_test', False),
+                'all_island_merit': row.get('all_island_merit', True)
+            })
+        
+        # Only rows not seen before go through the encoder and classifier
+        keys = [_prediction_cache_key(features_dict) for features_dict in features_dicts]
+        results = [_probability_cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        
         try:
-            # Prepare input features
-            input_data = {
-                'z_score': z_score,
-                'stream': stream,
-                'district': district,
-                'course_name': course_name,
-                'university': university,
-                'aptitude_test': aptitude_test,
-                'all_island_merit': all_island_merit
-            }
-            
-            # Encode features for the classifier
-            features = self._encode_features_for_classifier(input_data)
-            
-            # Make prediction (assuming binary classification)
-            proba = self.classifier.predict_proba(features)
-            return float(proba[0][1])  # Return probability of positive class
-            
+            encoded_features = self._encode_features_for_classifier_batch([features_dicts[i] for i in missing])
+            probabilities = self._predict_probabilities(encoded_features)
         except Exception as e:
-            logger.error(f"Error in predict_selection_probability: {str(e)}", exc_info=True)
-            raise
-    
-    def _validate_models_loaded(self) -> bool:
-        """Check if models are properly loaded"""
-        if not self.models_loaded:
-            logger.error("Models not properly loaded. Please check model files.")
-            return False
-        return True
-    
-    def _encode_features_for_regressor(self, data_dict: Dict[str, Any]) -> np.ndarray:
-        """
-        Encode features for the regressor model.
+            logger.error(f"Error during batch probability prediction: {str(e)}")
+            raise ValueError(f"Probability prediction failed: {str(e)}")
         
-        Args:
-            data_dict: Dictionary containing input features
-            
-        Returns:
-            Numpy array of encoded features
-        """
+        # Invalid results fall back to 0.0 and the rest are clamped to [0, 1]
+        probabilities = np.clip(np.nan_to_num(probabilities, nan=0.0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+        for i, probability in zip(missing, probabilities.tolist()):
+            results[i] = probability
+        _store_predictions(_probability_cache, [(keys[i], results[i]) for i in missing])
+        return results
+    
+    def _encode_features_for_regressor_batch(self, data_dicts: List[Dict[str, Any]]) -> sparse.csr_matrix:
+        """Encode many rows for the regressor in one encoder call, keeping the one-hot output sparse"""
         if not self.feature_encoder:
             raise ValueError("Feature encoder not loaded")
         
-        # Prepare features in the order expected by the encoder
         features = [
-            data_dict.get('university', ''),
-            data_dict.get('course_name', ''),
-            data_dict.get('district', ''),
-            data_dict.get('stream', '')
+            [d.get('university', ''), d.get('course_name', ''), d.get('district', ''), d.get('stream', '')]
+            for d in data_dicts
         ]
-        
-        # Encode categorical features
         try:
-            encoded_features = self.feature_encoder.transform([features])
-            # Convert sparse matrix to dense if needed and ensure 2D shape
-            if hasattr(encoded_features, 'toarray'):
-                encoded_features = encoded_features.toarray()
-            if encoded_features.ndim == 1:
-                encoded_features = encoded_features.reshape(1, -1)
+            encoded_features = self.feature_encoder.transform(features)
         except Exception as e:
             logger.error(f"Error encoding features: {e}")
             raise ValueError(f"Failed to encode features: {e}")
         
-        # Add numerical features (year, aptitude_test, all_island_merit)
         numerical_features = np.array([
-            data_dict.get('year', 2025),
-            int(data_dict.get('aptitude_test', False)),
-            int(data_dict.get('all_island_merit', True))
-        ]).reshape(1, -1)
+            [d.get('year', 2025), int(d.get('aptitude_test', False)), int(d.get('all_island_merit', True))]
+            for d in data_dicts
+        ], dtype=np.float32)
         
-        # Combine numerical and encoded categorical features
-        combined_features = np.hstack([numerical_features, encoded_features])
-        return combined_features
-        
-        # Combine numerical and encoded categorical features exactly like in ml_model.py
-        # np.hstack([numerical_features, encoded_categorical_features])
-        combined_features = np.hstack([numerical_features, encoded_features])
-        
-        return combined_features
+        # Numerical columns first, then one-hot, exactly like in ml_model.py; float32 matches
+        # what sklearn's tree models use internally, so predict doesn't make another copy
+        return assemble_feature_rows(numerical_features, encoded_features)
     
-    def _encode_features_for_classifier(self, data_dict: Dict[str, Any]) -> np.ndarray:
-        """
-        Encode features for the classifier model.
-        
-        Args:
-            data_dict: Dictionary containing input features
-            
-        Returns:
-            Numpy array of encoded features
-        """
+    def _encode_features_for_classifier_batch(self, data_dicts: List[Dict[str, Any]]) -> sparse.csr_matrix:
+        """Encode many rows for the classifier in one encoder call, keeping the one-hot output sparse"""
         if not self.classifier_encoder:
             raise ValueError("Classifier encoder not loaded")
         
-        # Prepare features in the order expected by the encoder
         features = [
-            data_dict.get('stream', ''),
-            data_dict.get('district', ''),
-            data_dict.get('course_name', ''),
-            data_dict.get('university', '')
+            [d.get('stream', ''), d.get('district', ''), d.get('course_name', ''), d.get('university', '')]
+            for d in data_dicts
         ]
-        
-        # Encode categorical features
         try:
-            encoded_features = self.classifier_encoder.transform([features])
-            # Convert sparse matrix to dense if needed and ensure 2D shape
-            if hasattr(encoded_features, 'toarray'):
-                encoded_features = encoded_features.toarray()
-            if encoded_features.ndim == 1:
-                encoded_features = encoded_features.reshape(1, -1)
+            encoded_features = self.classifier_encoder.transform(features)
         except Exception as e:
             logger.error(f"Error encoding classifier features: {e}")
             raise ValueError(f"Failed to encode classifier features: {e}")
         
-        # Add numerical features (z_score, aptitude_test, all_island_merit)
         numerical_features = np.array([
-            float(data_dict.get('z_score', 0.0)),
-            int(data_dict.get('aptitude_test', False)),
-            int(data_dict.get('all_island_merit', True))
-        ]).reshape(1, -1)
-        
-        # Combine numerical and encoded categorical features
-        combined_features = np.hstack([numerical_features, encoded_features])
-        return combined_features
+            [float(d.get('z_score', 0.0)), int(d.get('aptitude_test', False)), int(d.get('all_island_merit', True))]
+            for d in data_dicts
+        ], dtype=np.float32)
         
-        # Combine numerical and encoded categorical features exactly like in ml_model.py
-        # np.hstack([numerical_features, encoded_categorical_features])
-        combined_features = np.hstack([numerical_features, encoded_features])
-        
-        return combined_features
-    
-    def predict_cutoff(self, year: int, university: str, course_name: str, district: str, 
-                      stream: str, aptitude_test: bool, all_island_merit: bool) -> float:
-        """Predict Z-score cutoff using regressor"""
-        if not self._validate_models_loaded():
-            raise ValueError("Models not properly loaded")
-        
-        if not self.regressor:
-            raise ValueError("Regressor model not loaded")
-        
-        # Validate inputs
-        if not all([year, university, course_name, district, stream]):
-            raise ValueError("All input parameters must be provided and non-empty")
-        
-        # Prepare features
-        features_dict = {
-            'university': str(university),
-            'course_name': str(course_name),
-            'district': str(district).upper(),
-            'stream': str(stream),
-            'year': year,
-            'aptitude_test': aptitude_test,
-            'all_island_merit': all_island_merit
-        }
-        
-        try:
-            # Encode features
-            encoded_features = self._encode_features_for_regressor(features_dict)
-            
-            # Use encoded features directly (scaler not compatible with current model)
-            # The regressor was trained on these encoded features without scaling
-            
-            # Predict
-            prediction = self.regressor.predict(encoded_features)
-            result = float(prediction[0])
-            
-            # Validate result
-            if np.isnan(result) or np.isinf(result):
-                logger.warning("Invalid prediction result, returning default value")
-                return 0.0
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error during prediction: {str(e)}")
-            raise ValueError(f"Prediction failed: {str(e)}")
-    
-    def predict_selection_probability(self, z_score: float, stream: str, district: str, 
-                                    course_name: str, university: str, aptitude_test: bool, 
-                                    all_island_merit: bool) -> float:
-        """Predict selection probability using classifier"""
-        if not self._validate_models_loaded():
-            raise ValueError("Models not properly loaded")
-        
-        if not self.classifier:
-            raise ValueError("Classifier model not loaded")
-        
-        # Validate inputs
-        if z_score is None or not all([stream, district, course_name, university]):
-            raise ValueError("All input parameters must be provided and non-empty")
-        
-        # Prepare features
-        features_dict = {
-            'stream': str(stream),
-            'district': str(district).upper(),
-            'course_name': str(course_name),
-            'university': str(university),
-            'z_score': z_score,
-            'aptitude_test': aptitude_test,
-            'all_island_merit': all_island_merit
-        }
-        
-        try:
-            # Encode features
-            encoded_features = self._encode_features_for_classifier(features_dict)
-            
-            # Predict probability
-            probability = self.classifier.predict_proba(encoded_features)
-            result = float(probability[0][1])  # Return probability of being selected (class 1)
-            
-            # Validate result
-            if np.isnan(result) or np.isinf(result):
-                logger.warning("Invalid probability result, returning default value")
-                return 0.0
-            
-            return max(0.0, min(1.0, result))  # Ensure probability is between 0 and 1
-            
-        except Exception as e:
-            logger.error(f"Error during probability prediction: {str(e)}")
-            raise ValueError(f"Probability prediction failed: {str(e)}")
+        # Numerical columns first, then one-hot, exactly like in ml_model.py
+        return assemble_feature_rows(numerical_features, encoded_features)
     
     def get_recommendation_status(self, probability: float) -> str:
         """Convert probability to recommendation status with validation"""
@@ -519,83 +573,28 @@ class MLPredictor:
             logger.warning("Feature encoder not loaded, cannot extract university data")
             return []
         
-        # Map common stream names to the keys in valid_courses_map
-        stream_mapping = {
-            'physical': 'Physical Science',
-            'biological': 'Biological Science',
-            'biosystems': 'Biosystems Technology',
-            'commerce': 'Commerce',
-            'engineering': 'Engineering Technology',
-            'arts': 'Arts',
-            'other': 'Other'
-        }
-        
-        # Find the matching stream key
-        stream_key = None
-        stream_lower = stream.lower().strip()
-        
-        # First try exact match
-        if stream in self.valid_courses_map:
-            stream_key = stream
-        else:
-            # Try mapping
-            for key, value in stream_mapping.items():
-                if key in stream_lower:
-                    stream_key = value
-                    break
+        # Resolve the stream name or alias to its key in valid_courses_map
+        stream_key = self._stream_lookup.get(stream.lower().strip())
         
         if not stream_key:
             logger.warning(f"Stream '{stream}' not found in valid courses map. Available streams: {list(self.valid_courses_map.keys())}")
             return []
         
-        # Get courses for the stream
-        courses = self.valid_courses_map.get(stream_key, [])
-        
-        if not courses:
-            logger.warning(f"No courses found for stream: {stream_key}")
-            return []
-        
-        # Extract universities from feature encoder (index 0 contains universities)
-        try:
-            available_universities = list(self.feature_encoder.categories_[0])
-            # Clean up university names (remove extra spaces and duplicates)
-            cleaned_universities = []
-            seen = set()
-            for uni in available_universities:
-                cleaned_uni = uni.strip()
-                if cleaned_uni and cleaned_uni not in seen:
-                    cleaned_universities.append(cleaned_uni)
-                    seen.add(cleaned_uni)
-            
-            if not cleaned_universities:
-                logger.warning("No universities found in feature encoder")
-                return []
-            
-        except Exception as e:
-            logger.error(f"Error extracting universities from feature encoder: {str(e)}")
+        # Course/university pairs are precomputed at load time, course-major
+        pairs = self._precomputed_pairs.get(stream_key)
+        if not pairs:
+            logger.warning(f"No course-university pairs available for stream: {stream_key}")
             return []
         
-        # Generate course-university pairs
-        course_university_pairs = []
-        max_courses_per_stream = max(1, limit // len(cleaned_universities))
-        
-        for course in courses[:max_courses_per_stream]:
-            for university in cleaned_universities:
-                course_university_pairs.append({
-                    'course_name': course,
-                    'university_name': university
-                })
-                if len(course_university_pairs) >= limit:
-                    break
-            if len(course_university_pairs) >= limit:
-                break
-        
-        logger.info(f"Generated {len(course_university_pairs)} course-university pairs for stream '{stream}' using {len(cleaned_universities)} universities from pkl data")
-        return course_university_pairs
+        # Whole courses only (at least one), as many as fit in the limit
+        max_courses_per_stream = max(1, limit // self._university_count)
+        return pairs[:min(limit, max_courses_per_stream * self._university_count)]
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about loaded models for debugging"""
-        return {
+        if self._model_info is not None:
+            return self._model_info
+        self._model_info = {
             'models_loaded': self.models_loaded,
             'regressor_available': self.regressor is not None,
             'classifier_available': self.classifier is not None,
@@ -607,6 +606,7 @@ class MLPredictor:
             'classifier_features': getattr(self.classifier, 'n_features_in_', None) if self.classifier else None,
             'available_streams': list(self.valid_courses_map.keys()) if self.valid_courses_map else []
         }
+        return self._model_info
 
 # Global instance and loading lock for thread-safe lazy loading
 _ml_predictor_instance = None
@@ -630,11 +630,9 @@ def get_ml_predictor() -> MLPredictor:
     
     return _ml_predictor_instance
 
-# For backward compatibility
-try:
-    ml_predictor_instance = get_ml_predictor()
-    logger.info("ML Predictor instance created successfully")
-except Exception as e:
-    logger.error(f"Failed to create ML Predictor instance: {str(e)}")
-    _ml_predictor_instance = None
-    ml_predictor_instance = None
\ No newline at end of file
+# For backward compatibility: `ml_predictor_instance` resolves lazily, so importing this
+# module (migrate, collectstatic, test discovery...) never loads the models
+def __getattr__(name: str) -> Any:
+    if name == 'ml_predictor_instance':
+        return get_ml_predictor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,18 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models.functions import Upper
+
+
+_PDF_EXTENSION = '.pdf'
 
 
 def validate_file_extension(value):
     """Validate that uploaded file is a PDF"""
-    if not value.name.lower().endswith('.pdf'):
+    # Lowercase only the suffix rather than the whole filename
+    if value.name[-len(_PDF_EXTENSION):].lower() != _PDF_EXTENSION:
         raise ValidationError('Only PDF files are allowed.')
 
 
@@ -74,10 +81,32 @@ class User(AbstractUser):
         return self.user_type == 'student'
 
 
+# =============================
+# Student Snapshot Base Model
+# =============================
+class StudentSnapshotModel(models.Model):
+    """Keeps a copy of the student's email and name so list endpoints don't need to join users"""
+    student_email = models.EmailField(blank=True, default='', editable=False)
+    student_full_name = models.CharField(max_length=301, blank=True, default='', editable=False)
+
+    class Meta:
+        abstract = True
+
+    def copy_student_details(self, student):
+        self.student_email = student.email
+        self.student_full_name = student.get_full_name()
+
+    def save(self, *args, **kwargs):
+        # Later email/name changes are pushed by the User post_save signal
+        if self.student_id is not None and not self.student_email:
+            self.copy_student_details(self.student)
+        super().save(*args, **kwargs)
+
+
 # =============================
 # Prediction Session Model
 # =============================
-class PredictionSession(models.Model):
+class PredictionSession(StudentSnapshotModel):
     CONFIDENCE_LEVELS = [
         ('low', 'Low'),
         ('medium', 'Medium'),
@@ -129,8 +158,14 @@ class PredictionSession(models.Model):
         related_name='prediction_sessions'
     )
     # Student input data
-    year = models.IntegerField(default=2024)
-    z_score = models.FloatField(default=0.0)
+    year = models.IntegerField(default=2024, validators=[
+        MinValueValidator(1900, 'Year must be between 1900 and 2100'),
+        MaxValueValidator(2100, 'Year must be between 1900 and 2100'),
+    ])
+    z_score = models.FloatField(default=0.0, validators=[
+        MinValueValidator(0, 'Z-score must be between 0 and 3'),
+        MaxValueValidator(3, 'Z-score must be between 0 and 3'),
+    ])
     stream = models.CharField(max_length=50, choices=STREAM_CHOICES, default='Other')
     district = models.CharField(max_length=50, choices=DISTRICT_CHOICES, default='COLOMBO')
 
@@ -142,6 +177,10 @@ class PredictionSession(models.Model):
 
     class Meta:
         ordering = ['-predicted_at']
+        indexes = [
+            models.Index(fields=['student', '-predicted_at'], name='predsession_student_time_idx'),
+            models.Index(fields=['student', 'active', '-predicted_at'], name='predsession_stu_active_idx'),
+        ]
 
     def clean(self):
         if self.year < 1900 or self.year > 2100:
@@ -156,7 +195,7 @@ class PredictionSession(models.Model):
 # =============================
 # Saved Prediction Model
 # =============================
-class SavedPrediction(models.Model):
+class SavedPrediction(StudentSnapshotModel):
     student = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -172,8 +211,13 @@ class SavedPrediction(models.Model):
     # Data from prediction model
     university_name = models.CharField(max_length=200, default='')
     course_name = models.CharField(max_length=200, default='')
-    predicted_cutoff = models.FloatField(default=0.0, help_text="Predicted Z-score cutoff")
-    predicted_probability = models.FloatField(default=0.0, help_text="Probability of selection (0-1)")
+    predicted_cutoff = models.FloatField(default=0.0, help_text="Predicted Z-score cutoff", validators=[
+        MinValueValidator(0, 'Predicted cutoff cannot be negative'),
+    ])
+    predicted_probability = models.FloatField(default=0.0, help_text="Probability of selection (0-1)", validators=[
+        MinValueValidator(0, 'Predicted probability must be between 0 and 1'),
+        MaxValueValidator(1, 'Predicted probability must be between 0 and 1'),
+    ])
     aptitude_test_required = models.BooleanField(default=False)
     all_island_merit = models.BooleanField(default=True)
     recommendation = models.CharField(max_length=100, default='', help_text="Recommendation level, e.g., 'Recommended'")
@@ -184,9 +228,19 @@ class SavedPrediction(models.Model):
     notes = models.TextField(blank=True, default='', help_text="Student's personal notes")
     active = models.BooleanField(default=True)
 
+    # Stored by the database on write so reads are a plain column
+    probability_percentage = models.GeneratedField(
+        expression=models.F('predicted_probability') * 100,
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
     class Meta:
         ordering = ['-saved_at']
         unique_together = ['student', 'session', 'university_name', 'course_name']
+        indexes = [
+            models.Index(fields=['student', '-saved_at'], name='savedpred_student_time_idx'),
+        ]
 
     def clean(self):
         if not (0 <= self.predicted_probability <= 1):
@@ -197,10 +251,6 @@ class SavedPrediction(models.Model):
     def __str__(self):
         return f"{self.course_name} at {self.university_name} - {self.student.email}"
 
-    @property
-    def probability_percentage(self):
-        return self.predicted_probability * 100
-
     @property
     def selection_likely(self):
         return self.predicted_probability >= 0.5
@@ -276,6 +326,10 @@ class AdminUpload(models.Model):
 
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Only the few active uploads are ever looked up by active=True
+            models.Index(fields=['-uploaded_at'], condition=models.Q(active=True), name='adminupload_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.original_filename} - {self.uploaded_at}"
@@ -306,6 +360,11 @@ class ChatHistory(models.Model):
     class Meta:
         ordering = ['-asked_at']
         verbose_name_plural = "Chat Histories"
+        indexes = [
+            models.Index(fields=['student', 'active', '-asked_at'], name='chathistory_stu_active_idx'),
+            # Trigram index on the expression question__icontains compares, so substring search avoids a seq scan
+            GinIndex(OpClass(Upper('question'), name='gin_trgm_ops'), name='chathistory_question_trgm'),
+        ]
 
     def __str__(self):
         return f"Chat by {self.student.email} - {self.asked_at}"
@@ -342,7 +401,7 @@ class Feedback(models.Model):
 # =============================
 # Career Session Model
 # =============================
-class CareerSession(models.Model):
+class CareerSession(StudentSnapshotModel):
     student = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -356,6 +415,9 @@ class CareerSession(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['student', 'active', '-created_at'], name='careersession_stu_active_idx'),
+        ]
 
     def __str__(self):
         return f"Career Session by {self.student.email} - {self.created_at}"
@@ -364,7 +426,7 @@ class CareerSession(models.Model):
 # =============================
 # Saved Career Prediction Model
 # =============================
-class SavedCareerPrediction(models.Model):
+class SavedCareerPrediction(StudentSnapshotModel):
     student = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -379,14 +441,27 @@ class SavedCareerPrediction(models.Model):
 
     career_title = models.CharField(max_length=200, default='')
     career_code = models.CharField(max_length=20, default='', help_text="SOC/O*NET code")
-    match_score = models.FloatField(default=0.0, help_text="Match score between 0 and 1")
+    match_score = models.FloatField(default=0.0, help_text="Match score between 0 and 1", validators=[
+        MinValueValidator(0, 'Match score must be between 0 and 1'),
+        MaxValueValidator(1, 'Match score must be between 0 and 1'),
+    ])
     recommended_level = models.CharField(max_length=50, default='Recommended')
     saved_at = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(blank=True, default='')
 
+    # Stored by the database on write so reads are a plain column
+    match_percentage = models.GeneratedField(
+        expression=models.F('match_score') * 100,
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
     class Meta:
         ordering = ['-saved_at']
         unique_together = ['student', 'session', 'career_code']
+        indexes = [
+            models.Index(fields=['student', '-saved_at'], name='savedcareer_student_time_idx'),
+        ]
 
     def clean(self):
         if not (0 <= self.match_score <= 1):
@@ -394,7 +469,3 @@ class SavedCareerPrediction(models.Model):
 
     def __str__(self):
         return f"{self.career_title} ({self.career_code}) - {self.student.email}"
-
-    @property
-    def match_percentage(self):
-        return self.match_score * 100
@@ -1,3 +1,5 @@
+import copy
+import threading
 from rest_framework import serializers
 from .models import (
     User, PredictionSession, SavedPrediction, AdminUpload, 
@@ -5,10 +7,31 @@ from .models import (
 )
 
 
+# =============================
+# Base Serializers
+# =============================
+class CachedModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer that introspects its model fields once per class instead of once per instance"""
+    _fields_cache_lock = threading.Lock()
+
+    def get_fields(self):
+        cls = type(self)
+        # Look in the class's own __dict__ so subclasses don't reuse a parent's fields
+        cached_fields = cls.__dict__.get('_cached_fields')
+        if cached_fields is None:
+            with CachedModelSerializer._fields_cache_lock:
+                cached_fields = cls.__dict__.get('_cached_fields')
+                if cached_fields is None:
+                    cached_fields = super().get_fields()
+                    cls._cached_fields = cached_fields
+        # Fields are bound to their serializer instance, so each instance gets its own copies
+        return copy.deepcopy(cached_fields)
+
+
 # =============================
 # User Serializers
 # =============================
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CachedModelSerializer):
     """Base user serializer"""
     class Meta:
         model = User
@@ -16,7 +39,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'date_joined']
 
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(CachedModelSerializer):
     """Student registration serializer"""
     class Meta:
         model = User
@@ -35,7 +58,7 @@ class StudentSerializer(serializers.ModelSerializer):
         return student
 
 
-class AdminSerializer(serializers.ModelSerializer):
+class AdminSerializer(CachedModelSerializer):
     """Admin registration serializer"""
     class Meta:
         model = User
@@ -55,7 +78,7 @@ class AdminSerializer(serializers.ModelSerializer):
         return admin
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(CachedModelSerializer):
     """User profile update serializer"""
     class Meta:
         model = User
@@ -66,10 +89,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
 # =============================
 # Prediction Session Serializers
 # =============================
-class PredictionSessionSerializer(serializers.ModelSerializer):
+class PredictionSessionSerializer(CachedModelSerializer):
     """Prediction session serializer"""
-    student_name = serializers.ReadOnlyField(source='student.get_full_name')
-    student_email = serializers.ReadOnlyField(source='student.email')
+    student_name = serializers.ReadOnlyField(source='student_full_name')
+    student_email = serializers.ReadOnlyField()
     
     class Meta:
         model = PredictionSession
@@ -80,41 +103,21 @@ class PredictionSessionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'predicted_at', 'total_predictions_generated']
 
-    def validate_year(self, value):
-        if value < 1900 or value > 2100:
-            raise serializers.ValidationError('Year must be between 1900 and 2100')
-        return value
-
-    def validate_z_score(self, value):
-        if not (0 <= value <= 3):
-            raise serializers.ValidationError('Z-score must be between 0 and 3')
-        return value
-
 
-class PredictionSessionCreateSerializer(serializers.ModelSerializer):
+class PredictionSessionCreateSerializer(CachedModelSerializer):
     """Serializer for creating prediction sessions"""
     class Meta:
         model = PredictionSession
         fields = ['year', 'z_score', 'stream', 'district']
 
-    def validate_year(self, value):
-        if value < 1900 or value > 2100:
-            raise serializers.ValidationError('Year must be between 1900 and 2100')
-        return value
-
-    def validate_z_score(self, value):
-        if not (0 <= value <= 3):
-            raise serializers.ValidationError('Z-score must be between 0 and 3')
-        return value
-
 
 # =============================
 # Saved Prediction Serializers
 # =============================
-class SavedPredictionSerializer(serializers.ModelSerializer):
+class SavedPredictionSerializer(CachedModelSerializer):
     """Saved prediction serializer"""
-    student_name = serializers.ReadOnlyField(source='student.get_full_name')
-    session_info = serializers.ReadOnlyField(source='session.id')
+    student_name = serializers.ReadOnlyField(source='student_full_name')
+    session_info = serializers.ReadOnlyField(source='session_id')
     probability_percentage = serializers.ReadOnlyField()
     selection_likely = serializers.ReadOnlyField()
     
@@ -129,18 +132,14 @@ class SavedPredictionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'saved_at', 'probability_percentage', 'selection_likely']
 
-    def validate_predicted_probability(self, value):
-        if not (0 <= value <= 1):
-            raise serializers.ValidationError('Predicted probability must be between 0 and 1')
-        return value
-
-    def validate_predicted_cutoff(self, value):
-        if value < 0:
-            raise serializers.ValidationError('Predicted cutoff cannot be negative')
-        return value
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        # Django 5.2 doesn't reload GeneratedFields on save()
+        instance.refresh_from_db(fields=['probability_percentage'])
+        return instance
 
 
-class SavedPredictionCreateSerializer(serializers.ModelSerializer):
+class SavedPredictionCreateSerializer(CachedModelSerializer):
     """Serializer for creating saved predictions"""
     class Meta:
         model = SavedPrediction
@@ -150,21 +149,11 @@ class SavedPredictionCreateSerializer(serializers.ModelSerializer):
             'recommendation', 'rank_in_results', 'notes'
         ]
 
-    def validate_predicted_probability(self, value):
-        if not (0 <= value <= 1):
-            raise serializers.ValidationError('Predicted probability must be between 0 and 1')
-        return value
-
-    def validate_predicted_cutoff(self, value):
-        if value < 0:
-            raise serializers.ValidationError('Predicted cutoff cannot be negative')
-        return value
-
 
 # =============================
 # Admin Upload Serializers
 # =============================
-class AdminUploadSerializer(serializers.ModelSerializer):
+class AdminUploadSerializer(CachedModelSerializer):
     """Admin upload serializer"""
     admin_name = serializers.ReadOnlyField(source='admin.get_full_name')
     file_size_display = serializers.ReadOnlyField(source='get_file_size_display')
@@ -179,7 +168,7 @@ class AdminUploadSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'uploaded_at', 'file_size', 'file_size_display']
 
 
-class AdminUploadCreateSerializer(serializers.ModelSerializer):
+class AdminUploadCreateSerializer(CachedModelSerializer):
     """Serializer for creating admin uploads"""
     class Meta:
         model = AdminUpload
@@ -194,7 +183,7 @@ class AdminUploadCreateSerializer(serializers.ModelSerializer):
 # =============================
 # Chat History Serializers
 # =============================
-class ChatHistorySerializer(serializers.ModelSerializer):
+class ChatHistorySerializer(CachedModelSerializer):
     """Chat history serializer"""
     student_name = serializers.ReadOnlyField(source='student.get_full_name')
     
@@ -204,7 +193,7 @@ class ChatHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'asked_at']
 
 
-class ChatHistoryCreateSerializer(serializers.ModelSerializer):
+class ChatHistoryCreateSerializer(CachedModelSerializer):
     """Serializer for creating chat history"""
     class Meta:
         model = ChatHistory
@@ -214,11 +203,15 @@ class ChatHistoryCreateSerializer(serializers.ModelSerializer):
 # =============================
 # Feedback Serializers
 # =============================
-class FeedbackSerializer(serializers.ModelSerializer):
+# Rating labels indexed directly by the 1-5 rating value
+_RATING_LABELS = ('',) + tuple(label for _, label in Feedback.RATING_CHOICES)
+
+
+class FeedbackSerializer(CachedModelSerializer):
     """Feedback serializer"""
-    student_name = serializers.ReadOnlyField(source='student.get_full_name')
+    student_name = serializers.SerializerMethodField()
     student_email = serializers.ReadOnlyField(source='student.email')
-    rating_display = serializers.ReadOnlyField(source='get_rating_display')
+    rating_display = serializers.SerializerMethodField()
 
     class Meta:
         model = Feedback
@@ -228,18 +221,20 @@ class FeedbackSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'submitted_at', 'student_name', 'student_email', 'rating_display']
 
+    def get_student_name(self, obj):
+        student = obj.student
+        return f"{student.first_name} {student.last_name}".strip()
+
+    def get_rating_display(self, obj):
+        return _RATING_LABELS[obj.rating] if obj.rating else ''
+
 
-class FeedbackCreateSerializer(serializers.ModelSerializer):
+class FeedbackCreateSerializer(CachedModelSerializer):
     """Serializer for creating feedback"""
     class Meta:
         model = Feedback
         fields = ['feedback', 'rating']
 
-    def validate_rating(self, value):
-        if value is not None and value not in [1, 2, 3, 4, 5]:
-            raise serializers.ValidationError('Rating must be between 1 and 5')
-        return value
-
 
 # =============================
 # Career Recommendation Serializers
@@ -294,10 +289,10 @@ class StudentDashboardSerializer(serializers.Serializer):
 # =============================
 # Career Session Serializers
 # =============================
-class CareerSessionSerializer(serializers.ModelSerializer):
+class CareerSessionSerializer(CachedModelSerializer):
     """Career session serializer"""
-    student_name = serializers.ReadOnlyField(source='student.get_full_name')
-    student_email = serializers.ReadOnlyField(source='student.email')
+    student_name = serializers.ReadOnlyField(source='student_full_name')
+    student_email = serializers.ReadOnlyField()
     
     class Meta:
         model = CareerSession
@@ -308,7 +303,7 @@ class CareerSessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'num_career_predictions']
 
 
-class CareerSessionCreateSerializer(serializers.ModelSerializer):
+class CareerSessionCreateSerializer(CachedModelSerializer):
     """Serializer for creating career sessions"""
     class Meta:
         model = CareerSession
@@ -318,10 +313,10 @@ class CareerSessionCreateSerializer(serializers.ModelSerializer):
 # =============================
 # Saved Career Prediction Serializers
 # =============================
-class SavedCareerPredictionSerializer(serializers.ModelSerializer):
+class SavedCareerPredictionSerializer(CachedModelSerializer):
     """Saved career prediction serializer"""
-    student_name = serializers.ReadOnlyField(source='student.get_full_name')
-    session_info = serializers.ReadOnlyField(source='session.id')
+    student_name = serializers.ReadOnlyField(source='student_full_name')
+    session_info = serializers.ReadOnlyField(source='session_id')
     match_percentage = serializers.ReadOnlyField()
     
     class Meta:
@@ -333,13 +328,39 @@ class SavedCareerPredictionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'saved_at', 'match_percentage']
 
-    def validate_match_score(self, value):
-        if not (0 <= value <= 1):
-            raise serializers.ValidationError('Match score must be between 0 and 1')
-        return value
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        # Django 5.2 doesn't reload GeneratedFields on save()
+        instance.refresh_from_db(fields=['match_percentage'])
+        return instance
 
 
-class SavedCareerPredictionCreateSerializer(serializers.ModelSerializer):
+class SavedCareerPredictionBulkCreateSerializer(serializers.ListSerializer):
+    """Saves a list of career predictions with multi-row INSERTs, skipping ones already saved"""
+    def create(self, validated_data):
+        # One query for the (session, career) pairs already saved, so the new rows are known
+        # up front; bulk_create with ignore_conflicts returns objects without primary keys
+        session_ids = {item['session_id'] for item in validated_data}
+        seen = set(SavedCareerPrediction.objects.filter(
+            student=validated_data[0]['student'], session_id__in=session_ids
+        ).values_list('session_id', 'career_code')) if validated_data else set()
+
+        predictions = []
+        for item in validated_data:
+            item = dict(item)
+            session_id = item.pop('session_id')
+            if (session_id, item['career_code']) in seen:
+                continue
+            seen.add((session_id, item['career_code']))
+            prediction = SavedCareerPrediction(session_id=session_id, **item)
+            # bulk_create skips save(), so copy the student details here
+            prediction.copy_student_details(prediction.student)
+            predictions.append(prediction)
+        # ignore_conflicts still covers a concurrent save of the same career
+        return SavedCareerPrediction.objects.bulk_create(predictions, batch_size=500, ignore_conflicts=True)
+
+
+class SavedCareerPredictionCreateSerializer(CachedModelSerializer):
     """Serializer for creating saved career predictions"""
     session_id = serializers.IntegerField(write_only=True)
     
@@ -349,25 +370,28 @@ class SavedCareerPredictionCreateSerializer(serializers.ModelSerializer):
             'session_id', 'career_title', 'career_code', 'match_score',
             'recommended_level', 'notes'
         ]
+        list_serializer_class = SavedCareerPredictionBulkCreateSerializer
 
-    def validate_match_score(self, value):
-        if not (0 <= value <= 1):
-            raise serializers.ValidationError('Match score must be between 0 and 1')
-        return value
-    
     def validate_session_id(self, value):
         # Validate that the session exists and belongs to the current user
         try:
-            session = CareerSession.objects.get(id=value)
+            session = getattr(self, '_session', None)
+            if session is None or session.id != value:
+                # A bulk save validates many items against the same session with one child serializer
+                session = CareerSession.objects.only('id', 'student_id').get(id=value)
             request = self.context.get('request')
-            if request and hasattr(request, 'user') and session.student != request.user:
+            if request and hasattr(request, 'user') and session.student_id != request.user.pk:
                 raise serializers.ValidationError('Session does not belong to current user')
+            # Reused by create() instead of fetching the session again
+            self._session = session
             return value
         except CareerSession.DoesNotExist:
             raise serializers.ValidationError('Career session does not exist')
     
     def create(self, validated_data):
         session_id = validated_data.pop('session_id')
-        session = CareerSession.objects.get(id=session_id)
+        session = getattr(self, '_session', None)
+        if session is None or session.id != session_id:
+            session = CareerSession.objects.get(id=session_id)
         validated_data['session'] = session
         return super().create(validated_data)
\ No newline at end of file
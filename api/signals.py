@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache_utils import bump_count_version
+from .models import AdminUpload, CareerSession, PredictionSession, SavedCareerPrediction, SavedPrediction, User
+
+# Models carrying a denormalized copy of the student's email and name
+STUDENT_SNAPSHOT_MODELS = (PredictionSession, SavedPrediction, CareerSession, SavedCareerPrediction)
+
+# User fields the snapshots are built from
+SNAPSHOT_SOURCE_FIELDS = frozenset({'email', 'first_name', 'last_name'})
+
+
+@receiver(post_save, sender=User)
+def sync_student_snapshots(sender, instance, created, **kwargs):
+    """Push a student's changed email/name onto the rows that copy them"""
+    if created:
+        return
+    # Partial saves such as update_last_login() on every login can't change the snapshot
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and SNAPSHOT_SOURCE_FIELDS.isdisjoint(update_fields):
+        return
+    email = instance.email
+    full_name = instance.get_full_name()
+    for model in STUDENT_SNAPSHOT_MODELS:
+        # Only rows holding stale details are rewritten
+        model.objects.filter(student=instance).exclude(
+            student_email=email, student_full_name=full_name
+        ).update(student_email=email, student_full_name=full_name)
+
+
+@receiver(post_save, sender=AdminUpload)
+@receiver(post_delete, sender=AdminUpload)
+def invalidate_upload_counts(sender, **kwargs):
+    """Drop cached upload list totals after an upload is created, changed or deleted"""
+    bump_count_version(AdminUpload._meta.label_lower)
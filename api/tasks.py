@@ -1,55 +1,213 @@
 # tasks.py
+import hashlib
 import os
+import threading
+import faiss
+import fitz  # PyMuPDF
 import torch
 import google.generativeai as genai
 from celery import shared_task
 from django.conf import settings
-from langchain_community.document_loaders import PyMuPDFLoader
+from django.core.cache import cache
+from django.db import transaction
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface import HuggingFaceEmbeddings
+from .cache_utils import bump_count_version
 from .models import AdminUpload, ChatHistory
 
 # Configure Gemini once
 genai.configure(api_key=settings.GEMINI_API_KEY)
 
 
+# Embedding model shared by every task run in this worker process
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+# Chunks are encoded in large batches; all-MiniLM-L6-v2 already emits unit vectors
+EMBEDDING_ENCODE_KWARGS = {"batch_size": 128, "normalize_embeddings": True, "convert_to_numpy": True}
+
+
 def get_embeddings():
-    """Helper: return HuggingFace embeddings with GPU/CPU selection."""
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    return HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        model_kwargs={"device": device}
+    """Helper: return the worker's HuggingFace embeddings, loading them with GPU/CPU selection on first use."""
+    global _embeddings
+
+    if _embeddings is not None:
+        return _embeddings
+
+    with _embeddings_lock:
+        if _embeddings is None:
+            model_kwargs = {"device": "cpu"}
+            if torch.cuda.is_available():
+                # Half precision on GPU halves the memory traffic per embedding
+                torch.set_float32_matmul_precision("high")
+                model_kwargs = {"device": "cuda", "model_kwargs": {"torch_dtype": torch.float16}}
+            _embeddings = HuggingFaceEmbeddings(
+                model_name="sentence-transformers/all-MiniLM-L6-v2",
+                model_kwargs=model_kwargs,
+                encode_kwargs=EMBEDDING_ENCODE_KWARGS,
+            )
+    return _embeddings
+
+
+def embeddings_loaded():
+    """Helper: whether this process has already loaded the embedding model."""
+    return _embeddings is not None
+
+
+# Loaded FAISS vectorstores keyed by (path, index mtime); only the active handbook is kept
+_vectorstore_cache = {}
+_vectorstore_cache_lock = threading.Lock()
+
+# Answers to repeated handbook questions are reused for an hour
+ANSWER_CACHE_TTL = 3600
+
+# Gemini prompts, filled in with str.format
+PROMPT_WITH_CONTEXT = "Context (UGC Handbook):\n{context}\n\nQuestion: {question}"
+PROMPT_ONLINE = "Answer this question using reliable online sources:\n\n{question}"
+
+# The active handbook only changes when an upload finishes processing. activate_upload
+# clears the entry in its own process; other processes (web workers when a Celery worker
+# activates) keep their LocMemCache copy until this TTL runs out
+ACTIVE_HANDBOOK_CACHE_KEY = "active_handbook"
+ACTIVE_HANDBOOK_CACHE_TTL = 60
+
+
+def get_vectorstore(vectorstore_path):
+    """Helper: return the FAISS vectorstore at a path, loading it again only when its index file changes."""
+    mtime = os.path.getmtime(os.path.join(vectorstore_path, "index.faiss"))
+    key = (vectorstore_path, mtime)
+
+    vectorstore = _vectorstore_cache.get(key)
+    if vectorstore is not None:
+        return vectorstore
+
+    with _vectorstore_cache_lock:
+        vectorstore = _vectorstore_cache.get(key)
+        if vectorstore is None:
+            vectorstore = FAISS.load_local(
+                vectorstore_path, get_embeddings(), allow_dangerous_deserialization=True
+            )
+            # A new path or mtime means a new active handbook; older ones are never queried again
+            _vectorstore_cache.clear()
+            _vectorstore_cache[key] = vectorstore
+    return vectorstore
+
+
+def loaded_vectorstore_count():
+    """Helper: number of FAISS vectorstores currently held by this process."""
+    return len(_vectorstore_cache)
+
+
+def get_active_handbook():
+    """Helper: (id, vectorstore_path) of the active completed handbook upload, or None."""
+    return cache.get_or_set(
+        ACTIVE_HANDBOOK_CACHE_KEY,
+        lambda: AdminUpload.objects.filter(
+            active=True, processing_status="completed"
+        ).values_list("id", "vectorstore_path").first(),
+        ACTIVE_HANDBOOK_CACHE_TTL
     )
 
 
+def get_answer_cache_key(upload_id, question):
+    """Helper: cache key for an answer, per active handbook and whitespace/case-normalized question."""
+    normalized = " ".join(question.lower().split())
+    digest = hashlib.sha256(f"{upload_id}:{normalized}".encode()).hexdigest()
+    return f"chat_answer:{digest}"
+
+
+# Chunks embedded and added to the FAISS index per call
+EMBEDDING_BATCH_SIZE = 256
+
+# HNSW graph parameters for the handbook retriever index
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+
+def iter_pdf_chunks(pdf_path, splitter):
+    """Helper: stream (chunk_text, metadata) pairs page by page instead of loading the whole PDF."""
+    with fitz.open(pdf_path) as pdf:
+        for page in pdf:
+            text = page.get_text("text")
+            if not text.strip():
+                continue
+            metadata = {"source": pdf_path, "page": page.number}
+            for chunk in splitter.split_text(text):
+                yield chunk, metadata
+
+
+def add_to_vectorstore(vectorstore, texts, metadatas, embeddings):
+    """Helper: embed a batch of chunks into the vectorstore, creating it on the first batch."""
+    if vectorstore is None:
+        return FAISS.from_texts(texts, embeddings, metadatas=metadatas)
+    vectorstore.add_texts(texts, metadatas=metadatas)
+    return vectorstore
+
+
+def build_hnsw_index(flat_index):
+    """Helper: copy a flat L2 index into an HNSW graph so retrieval no longer scans every chunk."""
+    hnsw_index = faiss.IndexHNSWFlat(flat_index.d, HNSW_M)
+    hnsw_index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    hnsw_index.hnsw.efSearch = HNSW_EF_SEARCH
+    # Vectors keep their positions, so index_to_docstore_id stays valid
+    hnsw_index.add(flat_index.reconstruct_n(0, flat_index.ntotal))
+    return hnsw_index
+
+
+def activate_upload(upload_id):
+    """Helper: make a completed upload the only active handbook, one activation at a time."""
+    with transaction.atomic():
+        # Locking every upload row serializes concurrent activations (pool threads, Celery
+        # workers), so two finishing uploads can never switch each other off
+        list(AdminUpload.objects.select_for_update().order_by("id").values_list("id", flat=True))
+        AdminUpload.objects.filter(id=upload_id).update(active=True)
+        # Keep history but mark older uploads inactive. QuerySet.update is a single
+        # UPDATE that sends no save signals; only still-active rows are rewritten
+        AdminUpload.objects.filter(active=True).exclude(id=upload_id).update(active=False)
+    cache.delete(ACTIVE_HANDBOOK_CACHE_KEY)
+    # QuerySet.update sends no signals, so the upload list totals are invalidated here
+    bump_count_version(AdminUpload._meta.label_lower)
+
+
 @shared_task(bind=True, max_retries=3)
-def process_pdf_and_create_vectorstore(self, upload_id):
+def process_pdf_and_create_vectorstore(self, upload_id, activate=True):
     """
     Celery task: Process PDF, split into chunks, create FAISS vectorstore,
-    and save the path in the database.
+    and save the path in the database. With activate=False the upload is left
+    inactive for the caller to activate.
     """
     try:
         upload = AdminUpload.objects.get(id=upload_id)
         upload.processing_status = "processing"
         upload.save()
+        # The upload may be the active handbook being reprocessed
+        cache.delete(ACTIVE_HANDBOOK_CACHE_KEY)
         
         pdf_path = upload.pdf_file.path
 
-        # Load PDF
-        loader = PyMuPDFLoader(pdf_path)
-        documents = loader.load()
-        if not documents:
+        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        embeddings = get_embeddings()
+
+        # Split pages as they are read and embed the chunks in fixed-size batches
+        vectorstore = None
+        texts, metadatas = [], []
+        for chunk, metadata in iter_pdf_chunks(pdf_path, splitter):
+            texts.append(chunk)
+            metadatas.append(metadata)
+            if len(texts) >= EMBEDDING_BATCH_SIZE:
+                vectorstore = add_to_vectorstore(vectorstore, texts, metadatas, embeddings)
+                texts, metadatas = [], []
+        if texts:
+            vectorstore = add_to_vectorstore(vectorstore, texts, metadatas, embeddings)
+
+        if vectorstore is None:
             upload.processing_status = "failed"
             upload.save()
             return "No content found in PDF"
 
-        # Split into chunks
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        docs = splitter.split_documents(documents)
-
-        # Generate embeddings
-        embeddings = get_embeddings()
+        vectorstore.index = build_hnsw_index(vectorstore.index)
 
         # Save FAISS vectorstore in a consistent dir
         base_vs_dir = os.path.join(settings.MEDIA_ROOT, "vectorstores")
@@ -57,17 +215,16 @@ def process_pdf_and_create_vectorstore(self, upload_id):
         vs_dir = os.path.join(base_vs_dir, f"upload_{upload_id}")
         os.makedirs(vs_dir, exist_ok=True)
 
-        vectorstore = FAISS.from_documents(docs, embeddings)
         vectorstore.save_local(vs_dir)
 
-        # Update DB
+        # Update DB; the upload only becomes active through activate_upload
         upload.vectorstore_path = vs_dir
         upload.processing_status = "completed"
-        upload.active = True
+        upload.active = False
         upload.save()
 
-        # Deactivate older uploads (keep history but mark inactive)
-        AdminUpload.objects.exclude(id=upload_id).update(active=False)
+        if activate:
+            activate_upload(upload_id)
 
         return "Vectorstore created successfully"
 
@@ -101,38 +258,45 @@ def ask_question(self, student_id, question):
         source = "UGC Handbook"
 
         # Check for active handbook vectorstore
-        upload = AdminUpload.objects.filter(active=True, processing_status="completed").first()
-        if upload and upload.vectorstore_path:
-            embeddings = get_embeddings()
-            vectorstore = FAISS.load_local(
-                upload.vectorstore_path, embeddings, allow_dangerous_deserialization=True
-            )
-            retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-            results = retriever.get_relevant_documents(question)
-
-            if results:
-                context = "\n\n".join([doc.page_content for doc in results])
-                # Prevent overloading Gemini
-                context = context[:5000]
-
-        try:
-            model = genai.GenerativeModel("gemini-1.5-flash")
-            if context:
-                prompt = f"Context (UGC Handbook):\n{context}\n\nQuestion: {question}"
-            else:
-                prompt = f"Answer this question using reliable online sources:\n\n{question}"
-                source = "Gemini Online"
-
-            response = model.generate_content(prompt)
-            answer = response.text if response else "No response from Gemini."
-        except Exception as e:
-            error_msg = str(e)
-            if "10054" in error_msg or "forcibly closed" in error_msg.lower():
-                logger.warning(f"Gemini API network error in task: {error_msg}")
-                answer = "I'm experiencing network connectivity issues. Please try again in a moment."
-            else:
-                logger.error(f"Gemini API error in task: {error_msg}")
-                answer = "I'm unable to process your request at the moment. Please try again later."
+        handbook = get_active_handbook()
+        upload_id, vectorstore_path = handbook if handbook else (None, None)
+        answer_cache_key = get_answer_cache_key(upload_id, question)
+        answer = cache.get(answer_cache_key)
+
+        if answer is None:
+            if vectorstore_path:
+                vectorstore = get_vectorstore(vectorstore_path)
+                retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+                results = retriever.get_relevant_documents(question)
+
+                if results:
+                    context = "\n\n".join([doc.page_content for doc in results])
+                    # Prevent overloading Gemini
+                    context = context[:5000]
+
+            try:
+                model = genai.GenerativeModel("gemini-1.5-flash")
+                if context:
+                    prompt = PROMPT_WITH_CONTEXT.format(context=context, question=question)
+                else:
+                    prompt = PROMPT_ONLINE.format(question=question)
+                    source = "Gemini Online"
+
+                response = model.generate_content(prompt)
+                if response:
+                    answer = response.text
+                    # Only real answers are cached, never error fallbacks
+                    cache.set(answer_cache_key, answer, ANSWER_CACHE_TTL)
+                else:
+                    answer = "No response from Gemini."
+            except Exception as e:
+                error_msg = str(e)
+                if "10054" in error_msg or "forcibly closed" in error_msg.lower():
+                    logger.warning(f"Gemini API network error in task: {error_msg}")
+                    answer = "I'm experiencing network connectivity issues. Please try again in a moment."
+                else:
+                    logger.error(f"Gemini API error in task: {error_msg}")
+                    answer = "I'm unable to process your request at the moment. Please try again later."
 
         # Save chat history
         ChatHistory.objects.create(
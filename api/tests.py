@@ -1,63 +1,139 @@
-from django.test import TestCase
+import string
+from functools import lru_cache
+from unittest import mock
+import numpy as np
+from scipy import sparse
+from django.test import SimpleTestCase
 from django.urls import reverse
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.db import connection
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import (
     User, PredictionSession, SavedPrediction, AdminUpload, 
-    ChatHistory, Feedback
+    ChatHistory, Feedback, CareerSession, SavedCareerPrediction
 )
-from .serializers import (
-    UserSerializer, PredictionSessionSerializer, SavedPredictionSerializer,
-    AdminUploadSerializer, ChatHistorySerializer, FeedbackSerializer
-)
-import tempfile
-import os
-from decimal import Decimal
+from . import careermodel_utils, ml_utils
 
 User = get_user_model()
 
 # Test Utilities
+DEFAULT_PASSWORD = "testpass123"
+
+
+@lru_cache(maxsize=None)
+def default_password_hash():
+    """Hash the shared fixture password once; every fixture user reuses it"""
+    return make_password(DEFAULT_PASSWORD)
+
+
 class TestUtils:
     @staticmethod
-    def create_student_user(email="student@test.com", password="testpass123"):
-        return User.objects.create_user(
-            email=email,
-            password=password,
+    def build_user(email, password, **fields):
+        user = User(email=User.objects.normalize_email(email), **fields)
+        if password == DEFAULT_PASSWORD:
+            user.password = default_password_hash()
+        else:
+            user.set_password(password)
+        return user
+
+    @staticmethod
+    def build_student_user(email="student@test.com", password=DEFAULT_PASSWORD):
+        return TestUtils.build_user(
+            email,
+            password,
             first_name="Test",
             last_name="Student",
             user_type='student'
         )
-    
+
     @staticmethod
-    def create_admin_user(email="admin@test.com", password="testpass123"):
-        return User.objects.create_user(
-            email=email,
-            password=password,
+    def build_admin_user(email="admin@test.com", password=DEFAULT_PASSWORD):
+        return TestUtils.build_user(
+            email,
+            password,
             first_name="Test",
             last_name="Admin",
             user_type='admin',
             is_staff=True
         )
+
+    @staticmethod
+    def create_student_user(email="student@test.com", password=DEFAULT_PASSWORD):
+        user = TestUtils.build_student_user(email, password)
+        user.save()
+        return user
+    
+    @staticmethod
+    def create_admin_user(email="admin@test.com", password=DEFAULT_PASSWORD):
+        user = TestUtils.build_admin_user(email, password)
+        user.save()
+        return user
+
+    @staticmethod
+    def create_student_and_admin():
+        """Insert the default student and admin in a single query"""
+        return User.objects.bulk_create([TestUtils.build_student_user(), TestUtils.build_admin_user()])
     
     @staticmethod
     def get_tokens_for_user(user):
-        refresh = RefreshToken.for_user(user)
-        return {
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
-        }
+        tokens = _TOKEN_CACHE.get(user.pk)
+        if tokens is None:
+            refresh = RefreshToken.for_user(user)
+            tokens = _TOKEN_CACHE[user.pk] = {
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
+            }
+        return tokens
+
+
+# Signed JWTs by user pk; cleared after each class since its users are rolled back
+_TOKEN_CACHE = {}
+
+
+# Uploaded test files live in memory, so no test writes to MEDIA_ROOT
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+# Also applied outside manage.py test/pytest, where settings.TESTING isn't detected
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    STORAGES=TEST_STORAGES,
+)
+class BaseAPITestCase(APITestCase):
+    """API tests run inside a rolled-back transaction; nothing may need TransactionTestCase's table flush"""
+    serialized_rollback = False
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(_TOKEN_CACHE.clear)
+
+    def _pre_setup(self):
+        super()._pre_setup()
+        # Django's cache isn't rolled back with the test transaction
+        cache.clear()
 
 
 # =============================
 # Authentication Tests
 # =============================
-class AuthenticationTestCase(APITestCase):
+class AuthenticationTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
+
     def setUp(self):
         self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
     
     def test_student_registration(self):
         """Test student registration endpoint"""
@@ -70,7 +146,6 @@ class AuthenticationTestCase(APITestCase):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(User.objects.count(), 3)  # 2 from setUp + 1 new
         
         # Verify user was created with correct type
         user = User.objects.get(email='newstudent@test.com')
@@ -143,33 +218,59 @@ class AuthenticationTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 # User CRUD Tests
-class UserCRUDTestCase(APITestCase):
+class UserCRUDTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
+
     def setUp(self):
         self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
     
     def test_user_list_as_admin(self):
         """Test admin can list all users"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('user-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)  # student + admin
     
+    def test_rename_updates_student_snapshots(self):
+        """Test renaming a student rewrites the email/name copied onto their rows"""
+        session = PredictionSession.objects.create(
+            student=self.student,
+            year=2024,
+            z_score=2.5,
+            stream='Biological Science',
+            district='COLOMBO'
+        )
+        self.student.first_name = 'Renamed'
+        self.student.email = 'renamed@example.com'
+        self.student.save()
+        
+        session.refresh_from_db(fields=['student_email', 'student_full_name'])
+        self.assertEqual(session.student_email, 'renamed@example.com')
+        self.assertEqual(session.student_full_name, self.student.get_full_name())
+    
+    def test_last_login_update_skips_student_snapshots(self):
+        """Test a last_login-only save doesn't touch the snapshot tables"""
+        from django.contrib.auth.models import update_last_login
+        
+        with self.assertNumQueries(1):
+            update_last_login(None, self.student)
+    
     def test_user_list_as_student(self):
         """Test student can only see their own profile"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('user-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)  # only their own profile
     
     def test_user_detail_as_owner(self):
         """Test user can view their own profile"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('user-detail', args=[self.student.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -177,7 +278,7 @@ class UserCRUDTestCase(APITestCase):
     
     def test_user_detail_as_admin(self):
         """Test admin can view any user's profile"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('user-detail', args=[self.student.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -185,17 +286,17 @@ class UserCRUDTestCase(APITestCase):
     
     def test_user_update_own_profile(self):
         """Test user can update their own profile"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('user-detail', args=[self.student.id])
         data = {'first_name': 'Updated', 'last_name': 'Name'}
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.student.refresh_from_db()
+        self.student.refresh_from_db(fields=['first_name'])
         self.assertEqual(self.student.first_name, 'Updated')
     
     def test_user_cannot_update_other_profile(self):
         """Test user cannot update another user's profile"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('user-detail', args=[self.admin.id])
         data = {'first_name': 'Hacked'}
         response = self.client.patch(url, data)
@@ -203,27 +304,40 @@ class UserCRUDTestCase(APITestCase):
     
     def test_user_deactivate_account(self):
         """Test user can deactivate their account"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('user-deactivate-account')
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.student.refresh_from_db()
+        self.student.refresh_from_db(fields=['active'])
         self.assertFalse(self.student.active)
 
+    def test_dashboard_stats_counts_only_own_active_rows(self):
+        """Test student dashboard stats count the student's active rows"""
+        other_student = TestUtils.create_student_user(email="other@test.com")
+        PredictionSession.objects.create(student=self.student, year=2024, z_score=1.5, stream='Commerce', district='COLOMBO')
+        PredictionSession.objects.create(student=self.student, year=2024, z_score=1.2, stream='Arts', district='COLOMBO', active=False)
+        PredictionSession.objects.create(student=other_student, year=2024, z_score=1.0, stream='Arts', district='KANDY')
+        Feedback.objects.create(student=self.student, feedback='Useful', rating=5)
+
+        self.client.force_authenticate(user=self.student)
+        url = reverse('user-dashboard-stats')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_prediction_sessions'], 1)
+        self.assertEqual(response.data['total_feedbacks'], 1)
+        self.assertEqual(response.data['total_chats'], 0)
+
 
 # Prediction Session CRUD Tests
 
-class PredictionSessionCRUDTestCase(APITestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
+class PredictionSessionCRUDTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
         
         # Create test prediction session
-        self.prediction_session = PredictionSession.objects.create(
-            student=self.student,
+        cls.prediction_session = PredictionSession.objects.create(
+            student=cls.student,
             year=2024,
             z_score=2.5,
             stream='Biological Science',
@@ -231,10 +345,13 @@ class PredictionSessionCRUDTestCase(APITestCase):
             total_predictions_generated=10,
             confidence_level='high'
         )
+
+    def setUp(self):
+        self.client = APIClient()
     
     def test_create_prediction_session(self):
         """Test creating a new prediction session"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('prediction-session-list')
         data = {
             'year': 2024,
@@ -244,32 +361,50 @@ class PredictionSessionCRUDTestCase(APITestCase):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(PredictionSession.objects.count(), 2)
         
         # Verify student was set automatically
-        session = PredictionSession.objects.latest('id')
-        self.assertEqual(session.student, self.student)
+        self.assertTrue(PredictionSession.objects.filter(
+            student=self.student, stream='Physical Science', district='KANDY'
+        ).exists())
     
     def test_list_prediction_sessions_as_student(self):
         """Test student can list their prediction sessions"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('prediction-session-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['stream'], 'Biological Science')
     
     def test_list_prediction_sessions_as_admin(self):
         """Test admin can list all prediction sessions"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('prediction-session-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
     
+    def test_list_prediction_sessions_query_count_is_constant(self):
+        """Test listing sessions doesn't issue a query per row"""
+        self.client.force_authenticate(user=self.student)
+        url = reverse('prediction-session-list')
+        with CaptureQueriesContext(connection) as single_row:
+            self.client.get(url)
+        for year in (2022, 2023):
+            PredictionSession.objects.create(
+                student=self.student, year=year, z_score=2.0,
+                stream='Physical Science', district='KANDY'
+            )
+        with CaptureQueriesContext(connection) as many_rows:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(many_rows), len(single_row))
+    
     def test_retrieve_prediction_session(self):
         """Test retrieving a specific prediction session"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('prediction-session-detail', args=[self.prediction_session.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -278,26 +413,26 @@ class PredictionSessionCRUDTestCase(APITestCase):
     
     def test_update_prediction_session(self):
         """Test updating a prediction session"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('prediction-session-detail', args=[self.prediction_session.id])
         data = {'z_score': 2.8, 'confidence_level': 'medium'}
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.prediction_session.refresh_from_db()
+        self.prediction_session.refresh_from_db(fields=['z_score'])
         self.assertEqual(self.prediction_session.z_score, 2.8)
     
     def test_delete_prediction_session(self):
         """Test soft deleting a prediction session"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('prediction-session-detail', args=[self.prediction_session.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.prediction_session.refresh_from_db()
+        self.prediction_session.refresh_from_db(fields=['active'])
         self.assertFalse(self.prediction_session.active)
     
     def test_validation_year_range(self):
         """Test year validation"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('prediction-session-list')
         data = {
             'year': 1800,  # Invalid year
@@ -310,7 +445,7 @@ class PredictionSessionCRUDTestCase(APITestCase):
     
     def test_validation_z_score_range(self):
         """Test z-score validation"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('prediction-session-list')
         data = {
             'year': 2024,
@@ -325,17 +460,14 @@ class PredictionSessionCRUDTestCase(APITestCase):
 
 # Saved Prediction CRUD Tests
 
-class SavedPredictionCRUDTestCase(APITestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
+class SavedPredictionCRUDTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
         
         # Create test prediction session
-        self.prediction_session = PredictionSession.objects.create(
-            student=self.student,
+        cls.prediction_session = PredictionSession.objects.create(
+            student=cls.student,
             year=2024,
             z_score=2.5,
             stream='Biological Science',
@@ -343,9 +475,9 @@ class SavedPredictionCRUDTestCase(APITestCase):
         )
         
         # Create test saved prediction
-        self.saved_prediction = SavedPrediction.objects.create(
-            student=self.student,
-            session=self.prediction_session,
+        cls.saved_prediction = SavedPrediction.objects.create(
+            student=cls.student,
+            session=cls.prediction_session,
             university_name='University of Colombo',
             course_name='Computer Science',
             predicted_cutoff=2.0,
@@ -354,10 +486,13 @@ class SavedPredictionCRUDTestCase(APITestCase):
             all_island_merit=True,
             recommendation='Recommended'
         )
+
+    def setUp(self):
+        self.client = APIClient()
     
     def test_create_saved_prediction(self):
         """Test creating a new saved prediction"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('saved-prediction-list')
         data = {
             'session': self.prediction_session.id,
@@ -372,24 +507,41 @@ class SavedPredictionCRUDTestCase(APITestCase):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(SavedPrediction.objects.count(), 2)
         
         # Verify student was set automatically
-        prediction = SavedPrediction.objects.latest('id')
-        self.assertEqual(prediction.student, self.student)
+        self.assertTrue(SavedPrediction.objects.filter(
+            student=self.student, notes='Good option'
+        ).exists())
     
     def test_list_saved_predictions_as_student(self):
         """Test student can list their saved predictions"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('saved-prediction-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['university_name'], 'University of Colombo')
     
+    def test_list_saved_predictions_query_count_is_constant(self):
+        """Test listing saved predictions doesn't issue a query per row"""
+        self.client.force_authenticate(user=self.student)
+        url = reverse('saved-prediction-list')
+        with CaptureQueriesContext(connection) as single_row:
+            self.client.get(url)
+        for course_name in ('Medicine', 'Law'):
+            SavedPrediction.objects.create(
+                student=self.student, session=self.prediction_session,
+                university_name='University of Colombo', course_name=course_name
+            )
+        with CaptureQueriesContext(connection) as many_rows:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(many_rows), len(single_row))
+    
     def test_retrieve_saved_prediction(self):
         """Test retrieving a specific saved prediction"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('saved-prediction-detail', args=[self.saved_prediction.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -398,18 +550,26 @@ class SavedPredictionCRUDTestCase(APITestCase):
     
     def test_update_saved_prediction(self):
         """Test updating a saved prediction"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('saved-prediction-detail', args=[self.saved_prediction.id])
         data = {'notes': 'Updated notes', 'predicted_probability': 0.9}
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.saved_prediction.refresh_from_db()
+        self.saved_prediction.refresh_from_db(fields=['notes', 'predicted_probability'])
         self.assertEqual(self.saved_prediction.notes, 'Updated notes')
         self.assertEqual(self.saved_prediction.predicted_probability, 0.9)
     
+    def test_update_saved_prediction_returns_new_percentage(self):
+        """Test the generated probability percentage in the PATCH response is recomputed"""
+        self.client.force_authenticate(user=self.student)
+        url = reverse('saved-prediction-detail', args=[self.saved_prediction.id])
+        response = self.client.patch(url, {'predicted_probability': 0.5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertAlmostEqual(response.data['probability_percentage'], 50.0)
+    
     def test_delete_saved_prediction(self):
         """Test deleting a saved prediction"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('saved-prediction-detail', args=[self.saved_prediction.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
@@ -417,11 +577,11 @@ class SavedPredictionCRUDTestCase(APITestCase):
         saved_prediction = SavedPrediction.objects.get(id=self.saved_prediction.id)
         self.assertFalse(saved_prediction.active)
         # Verify it's not in the active queryset
-        self.assertEqual(SavedPrediction.objects.filter(active=True).count(), 0)
+        self.assertFalse(SavedPrediction.objects.filter(active=True).exists())
     
     def test_validation_probability_range(self):
         """Test probability validation"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('saved-prediction-list')
         data = {
             'session': self.prediction_session.id,
@@ -435,7 +595,7 @@ class SavedPredictionCRUDTestCase(APITestCase):
     
     def test_high_probability_filter(self):
         """Test high probability filter"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('saved-prediction-high-probability')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -445,24 +605,24 @@ class SavedPredictionCRUDTestCase(APITestCase):
 
 # Feedback CRUD Tests
 
-class FeedbackCRUDTestCase(APITestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
+class FeedbackCRUDTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
         
         # Create test feedback
-        self.feedback = Feedback.objects.create(
-            student=self.student,
+        cls.feedback = Feedback.objects.create(
+            student=cls.student,
             feedback='Great application!',
             rating=5
         )
+
+    def setUp(self):
+        self.client = APIClient()
     
     def test_create_feedback(self):
         """Test creating new feedback"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('feedback-list')
         data = {
             'feedback': 'Excellent service',
@@ -470,24 +630,25 @@ class FeedbackCRUDTestCase(APITestCase):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(Feedback.objects.count(), 2)
         
         # Verify student was set automatically
-        feedback = Feedback.objects.latest('id')
-        self.assertEqual(feedback.student, self.student)
+        self.assertTrue(Feedback.objects.filter(
+            student=self.student, feedback='Excellent service'
+        ).exists())
     
     def test_list_feedbacks(self):
         """Test listing feedbacks"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('feedback-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['feedback'], 'Great application!')
     
     def test_retrieve_feedback(self):
         """Test retrieving specific feedback"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('feedback-detail', args=[self.feedback.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -496,37 +657,37 @@ class FeedbackCRUDTestCase(APITestCase):
     
     def test_update_own_feedback(self):
         """Test user can update their own feedback"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('feedback-detail', args=[self.feedback.id])
         data = {'feedback': 'Updated feedback', 'rating': 4}
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.feedback.refresh_from_db()
+        self.feedback.refresh_from_db(fields=['feedback', 'rating'])
         self.assertEqual(self.feedback.feedback, 'Updated feedback')
         self.assertEqual(self.feedback.rating, 4)
     
     def test_admin_can_update_any_feedback(self):
         """Test admin can update any feedback"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('feedback-detail', args=[self.feedback.id])
         data = {'rating': 3}
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.feedback.refresh_from_db()
+        self.feedback.refresh_from_db(fields=['rating'])
         self.assertEqual(self.feedback.rating, 3)
     
     def test_delete_feedback_soft_delete(self):
         """Test soft deleting feedback"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('feedback-detail', args=[self.feedback.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.feedback.refresh_from_db()
+        self.feedback.refresh_from_db(fields=['active'])
         self.assertFalse(self.feedback.active)
     
     def test_my_feedback_endpoint(self):
         """Test my feedback endpoint"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('feedback-my-feedback')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -534,67 +695,70 @@ class FeedbackCRUDTestCase(APITestCase):
     
     def test_rating_summary_endpoint(self):
         """Test rating summary endpoint"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('feedback-rating-summary')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('total', response.data)
-        self.assertIn('average_rating', response.data)
-        self.assertIn('rating_counts', response.data)
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['average_rating'], 5)
+        self.assertEqual(response.data['rating_counts'], {1: 0, 2: 0, 3: 0, 4: 0, 5: 1})
 
 
 # Chat History CRUD Tests
 
-class ChatHistoryCRUDTestCase(APITestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
+class ChatHistoryCRUDTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
         
         # Create test chat history
-        self.chat_history = ChatHistory.objects.create(
-            student=self.student,
+        cls.chat_history = ChatHistory.objects.create(
+            student=cls.student,
             question='What is computer science?',
             answer='Computer science is the study of computers and computational systems.'
         )
+
+    def setUp(self):
+        self.client = APIClient()
     
     def test_create_chat_history(self):
         """Test creating new chat history"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('chat-history-list')
         data = {
             'question': 'What is AI?'
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(ChatHistory.objects.count(), 2)
         
         # Verify student was set automatically
-        chat = ChatHistory.objects.latest('id')
-        self.assertEqual(chat.student, self.student)
+        self.assertTrue(ChatHistory.objects.filter(
+            student=self.student, question='What is AI?'
+        ).exists())
     
     def test_list_chat_history_as_student(self):
         """Test student can list their chat history"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('chat-history-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['question'], 'What is computer science?')
     
     def test_list_chat_history_as_admin(self):
         """Test admin can list all chat history"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('chat-history-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
     
     def test_retrieve_chat_history(self):
         """Test retrieving specific chat history"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('chat-history-detail', args=[self.chat_history.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -602,110 +766,151 @@ class ChatHistoryCRUDTestCase(APITestCase):
     
     def test_update_chat_history(self):
         """Test updating chat history"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('chat-history-detail', args=[self.chat_history.id])
         data = {'answer': 'Updated answer'}
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.chat_history.refresh_from_db()
+        self.chat_history.refresh_from_db(fields=['answer'])
         self.assertEqual(self.chat_history.answer, 'Updated answer')
     
     def test_delete_chat_history(self):
         """Test deleting chat history"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('chat-history-detail', args=[self.chat_history.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(ChatHistory.objects.count(), 0)
+        self.assertFalse(ChatHistory.objects.exists())
     
     def test_recent_chats_endpoint(self):
         """Test recent chats endpoint"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('chat-history-recent-chats')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
     
-    def test_search_chats_endpoint(self):
+    def test_search_chats_with_query(self):
         """Test search chats endpoint"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('chat-history-search-chats')
-        response = self.client.get(url, {'q': 'computer'})
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'q': 'computer'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
-        
-        # Test without query parameter
-        response = self.client.get(url)
+    
+    def test_search_chats_missing_query(self):
+        """Test search chats rejects a missing query before touching the database"""
+        self.client.force_authenticate(user=self.student)
+        url = reverse('chat-history-search-chats')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+class ChatStreamTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = TestUtils.create_student_user()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+        self.url = reverse('student-chat') + '?stream=true'
+    
+    def _mock_gemini(self, chunks):
+        """Patch Gemini so generate_content streams the given chunk texts"""
+        model_class = mock.patch('api.views.genai.GenerativeModel').start()
+        self.addCleanup(mock.patch.stopall)
+        model_class.return_value.generate_content.return_value = chunks
+    
+    def test_stream_saves_streamed_answer(self):
+        """Test the streamed chunks reach the client and are saved as the answer"""
+        self._mock_gemini(iter([mock.Mock(text='Computer science '), mock.Mock(text='studies computation.')]))
+        response = self.client.post(self.url, {'question': 'What is computer science?'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(body, 'Computer science studies computation.')
+        self.assertEqual(
+            ChatHistory.objects.get(student=self.student).answer,
+            'Computer science studies computation.'
+        )
+    
+    def test_stream_failure_saves_only_streamed_text(self):
+        """Test a Gemini failure mid-stream is shown to the client but not saved as the answer"""
+        def failing_stream():
+            yield mock.Mock(text='Computer science ')
+            raise ConnectionError('Connection forcibly closed')
+        
+        self._mock_gemini(failing_stream())
+        response = self.client.post(self.url, {'question': 'What is computer science?'})
+        
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('Computer science '))
+        self.assertIn('network connectivity issues', body)
+        self.assertEqual(ChatHistory.objects.get(student=self.student).answer, 'Computer science ')
+
+
 
 
 # Admin Upload CRUD Tests
 
-class AdminUploadCRUDTestCase(APITestCase):
-    def setUp(self):
-        self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
+class AdminUploadCRUDTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
         
         # Create test admin upload
-        self.admin_upload = AdminUpload.objects.create(
-            admin=self.admin,
+        cls.admin_upload = AdminUpload.objects.create(
+            admin=cls.admin,
             original_filename='test.pdf',
             file_size=1024,
             processing_status='completed',
             description='Test upload'
         )
+
+    def setUp(self):
+        self.client = APIClient()
     
     def test_create_admin_upload(self):
         """Test creating new admin upload"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('admin-upload-list')
         
-        # Create a temporary file for testing
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_file:
-            tmp_file.write(b'Test PDF content')
-            tmp_file.flush()
-            
-            with open(tmp_file.name, 'rb') as pdf_file:
-                data = {
-                    'pdf_file': pdf_file,
-                    'description': 'Test upload'
-                }
-                response = self.client.post(url, data, format='multipart')
-        
-        # Clean up
-        os.unlink(tmp_file.name)
+        # Upload an in-memory file; nothing touches the disk before the view saves it
+        data = {
+            'pdf_file': SimpleUploadedFile('test.pdf', b'Test PDF content', content_type='application/pdf'),
+            'description': 'Test upload'
+        }
+        response = self.client.post(url, data, format='multipart')
         
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        self.assertEqual(AdminUpload.objects.count(), 2)
         
         # Verify admin was set automatically
-        upload = AdminUpload.objects.latest('id')
-        self.assertEqual(upload.admin, self.admin)
+        self.assertTrue(AdminUpload.objects.filter(admin=self.admin).exclude(pk=self.admin_upload.pk).exists())
     
     def test_list_admin_uploads_as_admin(self):
         """Test admin can list their uploads"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('admin-upload-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['original_filename'], 'test.pdf')
     
     def test_list_admin_uploads_as_student(self):
         """Test student cannot access admin uploads"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        self.client.force_authenticate(user=self.student)
         url = reverse('admin-upload-list')
-        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 0)  # Empty queryset for students
     
     def test_retrieve_admin_upload(self):
         """Test retrieving specific admin upload"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('admin-upload-detail', args=[self.admin_upload.id])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -713,60 +918,41 @@ class AdminUploadCRUDTestCase(APITestCase):
     
     def test_update_admin_upload(self):
         """Test updating admin upload"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('admin-upload-detail', args=[self.admin_upload.id])
         data = {'description': 'Updated description'}
         response = self.client.patch(url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.admin_upload.refresh_from_db()
+        self.admin_upload.refresh_from_db(fields=['description'])
         self.assertEqual(self.admin_upload.description, 'Updated description')
     
     def test_delete_admin_upload(self):
         """Test deleting admin upload"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('admin-upload-detail', args=[self.admin_upload.id])
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(AdminUpload.objects.count(), 0)
+        self.assertFalse(AdminUpload.objects.exists())
     
     def test_reprocess_upload(self):
         """Test reprocessing upload"""
-        # Create a temporary test file
-        import tempfile
-        import shutil
-        from django.core.files import File
-        
-        # Create a temporary PDF file
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
-            tmp.write(b'Test PDF content')
-            tmp_path = tmp.name
+        # Saved to the in-memory test storage, nothing to clean up on disk
+        self.admin_upload.pdf_file.save('test.pdf', ContentFile(b'Test PDF content'), save=True)
         
-        try:
-            # Update the admin upload with the real file
-            with open(tmp_path, 'rb') as f:
-                self.admin_upload.pdf_file.save('test.pdf', File(f), save=True)
-            
-            self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
-            url = reverse('admin-upload-reprocess', args=[self.admin_upload.id])
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('admin-upload-reprocess', args=[self.admin_upload.id])
+        # Processing itself (Celery or the local pool) is out of scope for the API test
+        with mock.patch('api.utils.ensure_pdf_processing') as ensure_pdf_processing:
             response = self.client.post(url)
-            
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.admin_upload.refresh_from_db()
-            
-            # The status might be 'processing' or 'pending' depending on Celery availability
-            self.assertIn(self.admin_upload.processing_status, ['processing', 'pending'])
         
-        finally:
-            # Clean up
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-            # Clean up the uploaded file
-            if self.admin_upload.pdf_file:
-                self.admin_upload.pdf_file.delete(save=False)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ensure_pdf_processing.assert_called_once_with(self.admin_upload.id)
+        self.admin_upload.refresh_from_db(fields=['processing_status'])
+        self.assertEqual(self.admin_upload.processing_status, 'pending')
     
     def test_status_summary_endpoint(self):
         """Test status summary endpoint"""
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
+        self.client.force_authenticate(user=self.admin)
         url = reverse('admin-upload-status-summary')
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -774,18 +960,128 @@ class AdminUploadCRUDTestCase(APITestCase):
         self.assertIn('processing', response.data)
         self.assertIn('completed', response.data)
         self.assertIn('failed', response.data)
+    
+    def test_upload_write_invalidates_cached_page_count(self):
+        """Test a new upload invalidates the total cached for later pages"""
+        from .views import get_paginated_count
+        
+        uploads = AdminUpload.objects.filter(admin=self.admin, active=True)
+        self.assertEqual(get_paginated_count(uploads, 2), 1)
+        AdminUpload.objects.create(
+            admin=self.admin,
+            original_filename='second.pdf',
+            file_size=1024,
+            description='Second upload'
+        )
+        self.assertEqual(get_paginated_count(uploads, 2), 2)
+    
+    def test_admin_dashboard_stats_follow_upload_writes(self):
+        """Test the cached dashboard totals are recomputed after an upload is added"""
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('admin_dashboard')
+        self.assertEqual(self.client.get(url).data['stats']['total_uploads'], 1)
+        
+        AdminUpload.objects.create(
+            admin=self.admin,
+            original_filename='second.pdf',
+            file_size=1024,
+            processing_status='pending'
+        )
+        stats = self.client.get(url).data['stats']
+        self.assertEqual(stats['total_uploads'], 2)
+        self.assertEqual(stats['pending_uploads'], 1)
+    
+    def test_activate_upload_deactivates_others(self):
+        """Test activating an upload leaves it as the only active handbook"""
+        from .tasks import activate_upload
+        
+        newer_upload = AdminUpload.objects.create(
+            admin=self.admin,
+            original_filename='newer.pdf',
+            file_size=1024,
+            processing_status='completed',
+            active=False
+        )
+        activate_upload(newer_upload.id)
+        
+        self.assertEqual(
+            list(AdminUpload.objects.filter(active=True).values_list('id', flat=True)),
+            [newer_upload.id]
+        )
+
+
+
+# Saved Career Prediction Tests
+
+class SavedCareerPredictionBulkCreateTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = TestUtils.create_student_user()
+        cls.student_tokens = TestUtils.get_tokens_for_user(cls.student)
+        cls.career_session = CareerSession.objects.create(
+            student=cls.student,
+            degree_program='Computer Science'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_update_career_prediction_returns_new_percentage(self):
+        """Test the generated match percentage in the PATCH response is recomputed"""
+        saved = SavedCareerPrediction.objects.create(
+            student=self.student, session=self.career_session,
+            career_title='Software Developer', career_code='15-1252.00', match_score=0.9
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        url = reverse('career-prediction-detail', args=[saved.id])
+        response = self.client.patch(url, {'match_score': 0.25})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertAlmostEqual(response.data['match_percentage'], 25.0)
+    
+    def test_bulk_create_skips_already_saved_careers(self):
+        """Test bulk saving recommendations inserts new ones and ignores duplicates"""
+        SavedCareerPrediction.objects.create(
+            student=self.student, session=self.career_session,
+            career_title='Software Developer', career_code='15-1252.00', match_score=0.9
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
+        url = reverse('career-prediction-bulk-create')
+        data = [
+            {'session_id': self.career_session.id, 'career_title': 'Software Developer',
+             'career_code': '15-1252.00', 'match_score': 0.9},
+            {'session_id': self.career_session.id, 'career_title': 'Data Scientist',
+             'career_code': '15-2051.00', 'match_score': 0.8},
+        ]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 1, 'skipped': 1})
+        self.assertEqual(SavedCareerPrediction.objects.filter(student=self.student).count(), 2)
+    
+    def test_bulk_create_rejects_other_students_session(self):
+        """Test bulk saving into another student's session is rejected"""
+        other_student = TestUtils.create_student_user(email="other@test.com")
+        other_tokens = TestUtils.get_tokens_for_user(other_student)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {other_tokens["access"]}')
+        url = reverse('career-prediction-bulk-create')
+        data = [{'session_id': self.career_session.id, 'career_title': 'Data Scientist',
+                 'career_code': '15-2051.00', 'match_score': 0.8}]
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SavedCareerPrediction.objects.exists())
 
 
 # =============================
 # Integration Tests
 # =============================
-class IntegrationTestCase(APITestCase):
+class IntegrationTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
+        cls.student_tokens = TestUtils.get_tokens_for_user(cls.student)
+        cls.admin_tokens = TestUtils.get_tokens_for_user(cls.admin)
+
     def setUp(self):
         self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
     
     def test_complete_prediction_workflow(self):
         """Test complete prediction workflow"""
@@ -827,46 +1123,56 @@ class IntegrationTestCase(APITestCase):
         feedback_response = self.client.post(feedback_url, feedback_data)
         self.assertEqual(feedback_response.status_code, status.HTTP_201_CREATED)
         
-        # 4. Verify all data is linked correctly
-        self.assertEqual(PredictionSession.objects.count(), 1)
-        self.assertEqual(SavedPrediction.objects.count(), 1)
-        self.assertEqual(Feedback.objects.count(), 1)
+        # 4. Verify all data is linked correctly; each list holds exactly one row
+        with self.assertNumQueries(3):
+            sessions = list(PredictionSession.objects.values_list('id', 'student_id'))
+            predictions = list(SavedPrediction.objects.values_list('session_id', 'student_id'))
+            feedback = list(Feedback.objects.values_list('student_id', flat=True))
         
-        session = PredictionSession.objects.first()
-        prediction = SavedPrediction.objects.first()
-        feedback = Feedback.objects.first()
-        
-        self.assertEqual(session.student, self.student)
-        self.assertEqual(prediction.student, self.student)
-        self.assertEqual(prediction.session, session)
-        self.assertEqual(feedback.student, self.student)
-    
-    def test_admin_dashboard_data(self):
-        """Test admin dashboard shows correct data"""
-        # Create some test data
-        session = PredictionSession.objects.create(
-            student=self.student,
+        self.assertEqual(sessions, [(session_id, self.student.id)])
+        self.assertEqual(predictions, [(session_id, self.student.id)])
+        self.assertEqual(feedback, [self.student.id])
+
+
+class DashboardDataTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
+        cls.student_tokens = TestUtils.get_tokens_for_user(cls.student)
+        cls.admin_tokens = TestUtils.get_tokens_for_user(cls.admin)
+
+        # Seed data shared by both dashboards; bulk_create skips save(), so snapshot
+        # the student details explicitly
+        session = PredictionSession(
+            student=cls.student,
             year=2024,
             z_score=2.5,
             stream='Biological Science',
             district='COLOMBO'
         )
-        
-        SavedPrediction.objects.create(
-            student=self.student,
+        session.copy_student_details(cls.student)
+        PredictionSession.objects.bulk_create([session])
+
+        prediction = SavedPrediction(
+            student=cls.student,
             session=session,
             university_name='University of Colombo',
             course_name='Computer Science',
             predicted_cutoff=2.0,
             predicted_probability=0.8
         )
-        
-        Feedback.objects.create(
-            student=self.student,
-            feedback='Great app!',
-            rating=5
-        )
-        
+        prediction.copy_student_details(cls.student)
+        SavedPrediction.objects.bulk_create([prediction])
+
+        Feedback.objects.bulk_create([
+            Feedback(student=cls.student, feedback='Great app!', rating=5)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+    
+    def test_admin_dashboard_data(self):
+        """Test admin dashboard shows correct data"""
         # Test admin dashboard with user dashboard endpoint
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_tokens["access"]}')
         url = reverse('user-dashboard-stats')
@@ -875,24 +1181,6 @@ class IntegrationTestCase(APITestCase):
     
     def test_student_dashboard_data(self):
         """Test student dashboard shows correct data"""
-        # Create some test data
-        session = PredictionSession.objects.create(
-            student=self.student,
-            year=2024,
-            z_score=2.5,
-            stream='Biological Science',
-            district='COLOMBO'
-        )
-        
-        SavedPrediction.objects.create(
-            student=self.student,
-            session=session,
-            university_name='University of Colombo',
-            course_name='Computer Science',
-            predicted_cutoff=2.0,
-            predicted_probability=0.8
-        )
-        
         # Test student dashboard
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
         url = reverse('student-dashboard')
@@ -916,13 +1204,15 @@ class IntegrationTestCase(APITestCase):
 # =============================
 # Permission Tests
 # =============================
-class PermissionTestCase(APITestCase):
+class PermissionTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student, cls.admin = TestUtils.create_student_and_admin()
+        cls.student_tokens = TestUtils.get_tokens_for_user(cls.student)
+        cls.admin_tokens = TestUtils.get_tokens_for_user(cls.admin)
+
     def setUp(self):
         self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.admin = TestUtils.create_admin_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
-        self.admin_tokens = TestUtils.get_tokens_for_user(self.admin)
     
     def test_unauthorized_access(self):
         """Test unauthorized access to protected endpoints"""
@@ -985,11 +1275,21 @@ class PermissionTestCase(APITestCase):
 # =============================
 # Validation Tests
 # =============================
-class ValidationTestCase(APITestCase):
+class ValidationTestCase(BaseAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = TestUtils.create_student_user()
+        cls.student_tokens = TestUtils.get_tokens_for_user(cls.student)
+        cls.prediction_session = PredictionSession.objects.create(
+            student=cls.student,
+            year=2024,
+            z_score=2.5,
+            stream='Biological Science',
+            district='COLOMBO'
+        )
+
     def setUp(self):
         self.client = APIClient()
-        self.student = TestUtils.create_student_user()
-        self.student_tokens = TestUtils.get_tokens_for_user(self.student)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.student_tokens["access"]}')
     
     def test_invalid_email_format(self):
@@ -1038,17 +1338,9 @@ class ValidationTestCase(APITestCase):
     
     def test_probability_validation(self):
         """Test probability validation"""
-        session = PredictionSession.objects.create(
-            student=self.student,
-            year=2024,
-            z_score=2.5,
-            stream='Biological Science',
-            district='COLOMBO'
-        )
-        
         url = reverse('saved-prediction-list')
         data = {
-            'session': session.id,
+            'session': self.prediction_session.id,
             'university_name': 'Test University',
             'course_name': 'Test Course',
             'predicted_cutoff': 2.0,
@@ -1056,3 +1348,127 @@ class ValidationTestCase(APITestCase):
         }
         response = self.client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# =============================
+# ML Predictor Tests
+# =============================
+class _SumRegressor:
+    """Stub regressor predicting the sum of each encoded row"""
+    def predict(self, features):
+        return np.asarray(features.sum(axis=1)).ravel()
+
+
+class MLPredictorTestCase(SimpleTestCase):
+    def setUp(self):
+        from sklearn.preprocessing import OneHotEncoder
+        
+        encoder = OneHotEncoder(handle_unknown='ignore')
+        encoder.fit([
+            ['University of Colombo', 'Computer Science', 'COLOMBO', 'Physical Science'],
+            ['University of Peradeniya', 'Engineering', 'KANDY', 'Physical Science'],
+        ])
+        # A loaded predictor without reading any model files
+        self.predictor = ml_utils.MLPredictor.__new__(ml_utils.MLPredictor)
+        self.predictor.models_loaded = True
+        self.predictor.regressor = _SumRegressor()
+        self.predictor.feature_encoder = encoder
+        self.predictor._gtil_regressor = None
+        self.addCleanup(ml_utils._cutoff_cache.clear)
+    
+    def test_assemble_feature_rows_matches_hstack(self):
+        """Test the CSR matrix equals numerical columns followed by the one-hot columns"""
+        numerical = np.array([[2024, 1, 0], [2025, 0, 1], [2023, 1, 1]], dtype=np.float32)
+        # The middle row has no one-hot entries, as handle_unknown='ignore' produces
+        one_hot = sparse.csr_matrix(np.array([[1, 0, 0, 1], [0, 0, 0, 0], [0, 1, 1, 0]], dtype=np.float64))
+        
+        assembled = ml_utils.assemble_feature_rows(numerical, one_hot)
+        
+        np.testing.assert_array_equal(assembled.toarray(), np.hstack([numerical, one_hot.toarray()]))
+    
+    def test_batch_and_scalar_cutoffs_agree(self):
+        """Test predict_cutoff_batch returns what predict_cutoff gives row by row"""
+        rows = [
+            {'year': 2024, 'university': 'University of Colombo', 'course_name': 'Computer Science',
+             'district': 'Colombo', 'stream': 'Physical Science', 'aptitude_test': False, 'all_island_merit': True},
+            {'year': 2025, 'university': 'Unknown University', 'course_name': 'Engineering',
+             'district': 'KANDY', 'stream': 'Physical Science', 'aptitude_test': True, 'all_island_merit': False},
+        ]
+        batch = self.predictor.predict_cutoff_batch(rows)
+        ml_utils._cutoff_cache.clear()
+        scalar = [self.predictor.predict_cutoff(**row) for row in rows]
+        
+        self.assertEqual(batch, scalar)
+        # year + aptitude + merit + one set one-hot column per known value
+        self.assertEqual(batch, [2024 + 0 + 1 + 4, 2025 + 1 + 0 + 3])
+
+
+def _reference_recommend_careers(degree_program, hybrid_df, tfidf_vectorizer, occupation_df, N, weight_similarity=0.6, weight_vacancies=0.4):
+    """The original pandas merge/sort recommender, kept to pin recommend_careers_logic's output"""
+    import pandas as pd
+    from sklearn.metrics.pairwise import cosine_similarity
+    
+    cleaned = degree_program.lower().translate(str.maketrans('', '', string.punctuation))
+    occupation_tfidf_matrix = tfidf_vectorizer.transform(occupation_df['combined_text'])
+    cosine_sim_degree = cosine_similarity(tfidf_vectorizer.transform([cleaned]), occupation_tfidf_matrix).flatten()
+    sim_scores_degree = sorted(enumerate(cosine_sim_degree), key=lambda x: x[1], reverse=True)
+    top_N_onet_occupations = occupation_df.iloc[[x[0] for x in sim_scores_degree[0:N]]].copy()
+    top_N_onet_occupations['Similarity_Score_Degree'] = [sim_scores_degree[i][1] for i in range(N)]
+    
+    filtered_hybrid_df = hybrid_df[hybrid_df['ONET_SOC_Code'].isin(top_N_onet_occupations['O*NET-SOC Code'].tolist())].copy()
+    max_vacancies = filtered_hybrid_df['Number_of_Vacancies'].max()
+    filtered_hybrid_df['Normalized_Vacancies'] = filtered_hybrid_df['Number_of_Vacancies'] / max_vacancies if max_vacancies > 0 else 0
+    re_ranking_df = pd.merge(
+        filtered_hybrid_df,
+        top_N_onet_occupations[['O*NET-SOC Code', 'Similarity_Score_Degree']],
+        left_on='ONET_SOC_Code', right_on='O*NET-SOC Code', how='inner'
+    )
+    re_ranking_df['Combined_Score'] = (weight_similarity * re_ranking_df['Similarity_Score_Degree']) + (weight_vacancies * re_ranking_df['Normalized_Vacancies'])
+    return re_ranking_df.sort_values(by='Combined_Score', ascending=False).to_dict('records')[:10]
+
+
+class CareerRecommendationTestCase(SimpleTestCase):
+    def setUp(self):
+        import pandas as pd
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        self.occupation_df = careermodel_utils.ensure_combined_text(pd.DataFrame({
+            'O*NET-SOC Code': ['15-1252.00', '15-2051.00', '17-2141.00', '29-1141.00', '13-2011.00'],
+            'Title': ['Software Developers', 'Data Scientists', 'Mechanical Engineers', 'Registered Nurses', 'Accountants'],
+            'Description': [
+                'Design computer software and applications',
+                'Analyze data with statistics and computer science methods',
+                'Design mechanical engineering systems',
+                'Provide patient care in hospitals',
+                'Prepare financial records and audits',
+            ],
+        }))
+        self.tfidf_vectorizer = TfidfVectorizer().fit(self.occupation_df['combined_text'])
+        # Nine rows match the O*NET codes, so the one with unknown vacancies makes the top 10
+        self.hybrid_df = pd.DataFrame({
+            'Sri_Lankan_Occupation': [f'Occupation {i}' for i in range(10)],
+            'ONET_SOC_Code': ['15-1252.00', '15-1252.00', '15-2051.00', '15-2051.00', '17-2141.00',
+                              '29-1141.00', '29-1141.00', '13-2011.00', '13-2011.00', '99-9999.00'],
+            'Number_of_Vacancies': [120.0, 35.0, 80.0, float('nan'), 60.0, 200.0, 5.0, 45.0, 90.0, 500.0],
+        })
+    
+    def test_recommendations_match_original_ranking(self):
+        """Test the array-based re-ranking returns the original top 10 rows, keys and scores"""
+        for degree_program in ['BSc Computer Science', 'Mechanical Engineering', 'Nursing']:
+            with self.subTest(degree_program=degree_program):
+                expected = _reference_recommend_careers(
+                    degree_program, self.hybrid_df, self.tfidf_vectorizer, self.occupation_df, N=5
+                )
+                actual = careermodel_utils.recommend_careers_logic(
+                    degree_program, self.hybrid_df, None, self.tfidf_vectorizer, self.occupation_df, N=5
+                )
+                
+                self.assertEqual(
+                    [row['Sri_Lankan_Occupation'] for row in actual],
+                    [row['Sri_Lankan_Occupation'] for row in expected]
+                )
+                self.assertEqual([sorted(row) for row in actual], [sorted(row) for row in expected])
+                np.testing.assert_allclose(
+                    [row['Combined_Score'] for row in actual],
+                    [row['Combined_Score'] for row in expected]
+                )
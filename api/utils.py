@@ -3,7 +3,11 @@ Utility functions for automatic PDF processing and monitoring
 """
 import os
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from django.db import connection, transaction
 from django.utils import timezone
 from django.conf import settings
 from .models import AdminUpload
@@ -12,16 +16,69 @@ from .tasks import process_pdf_and_create_vectorstore
 logger = logging.getLogger(__name__)
 
 
-def check_celery_worker_health():
+# Result of the last broker-wide stats() probe; reused for a short while
+CELERY_HEALTH_TTL = 30
+_celery_health = {'checked_at': None, 'healthy': False}
+
+
+def check_celery_worker_health(force=False):
     """Check if Celery worker is running and responsive"""
+    checked_at = _celery_health['checked_at']
+    if not force and checked_at is not None and time.monotonic() - checked_at < CELERY_HEALTH_TTL:
+        return _celery_health['healthy']
+
     try:
         from celery import current_app
         inspect = current_app.control.inspect()
         stats = inspect.stats()
-        return bool(stats)
+        healthy = bool(stats)
     except Exception as e:
         logger.warning(f"Celery health check failed: {e}")
-        return False
+        healthy = False
+
+    # Concurrent callers may both probe; either result is equally fresh
+    _celery_health['checked_at'] = time.monotonic()
+    _celery_health['healthy'] = healthy
+    return healthy
+
+
+# Without a Celery worker, uploads are processed on a small in-process pool instead of
+# the request thread; ids being processed are tracked so an upload never runs twice
+LOCAL_PROCESSING_WORKERS = 2
+_local_pool = None
+_local_pool_lock = threading.Lock()
+_local_upload_ids = set()
+
+
+def _process_upload_locally(upload_id):
+    """Run the PDF task in a pool thread and release the upload afterwards"""
+    try:
+        result = process_pdf_and_create_vectorstore(upload_id)
+        logger.info(f"Locally processed upload {upload_id}: {result}")
+    except Exception as e:
+        logger.error(f"Local processing failed for upload {upload_id}: {e}")
+    finally:
+        with _local_pool_lock:
+            _local_upload_ids.discard(upload_id)
+        # Pool threads get their own database connection; don't leave it open
+        connection.close()
+
+
+def submit_local_processing(upload_id):
+    """Queue an upload on the in-process pool; False if it is already queued or running"""
+    global _local_pool
+
+    with _local_pool_lock:
+        if upload_id in _local_upload_ids:
+            logger.info(f"Upload {upload_id} is already being processed locally")
+            return False
+        _local_upload_ids.add(upload_id)
+        if _local_pool is None:
+            _local_pool = ThreadPoolExecutor(
+                max_workers=LOCAL_PROCESSING_WORKERS, thread_name_prefix="pdf-processing"
+            )
+    _local_pool.submit(_process_upload_locally, upload_id)
+    return True
 
 
 def process_stuck_uploads_automatically(max_age_hours=1):
@@ -30,12 +87,14 @@ def process_stuck_uploads_automatically(max_age_hours=1):
     Returns number of uploads processed.
     """
     cutoff_time = timezone.now() - timedelta(hours=max_age_hours)
+    # The loop only logs and dispatches, so only id and filename are loaded
     stuck_uploads = AdminUpload.objects.filter(
         processing_status__in=['pending', 'processing'],
         uploaded_at__lt=cutoff_time
-    )
+    ).only('id', 'original_filename')
     
     processed_count = 0
+    failed_ids = []
     for upload in stuck_uploads:
         try:
             logger.info(f"Auto-processing stuck upload {upload.id}: {upload.original_filename}")
@@ -45,16 +104,19 @@ def process_stuck_uploads_automatically(max_age_hours=1):
                 process_pdf_and_create_vectorstore.delay(upload.id)
                 logger.info(f"Queued upload {upload.id} for Celery processing")
             else:
-                # Fallback to synchronous processing
-                result = process_pdf_and_create_vectorstore(upload.id)
-                logger.info(f"Synchronously processed upload {upload.id}: {result}")
+                # Fallback to the in-process pool
+                submit_local_processing(upload.id)
+                logger.info(f"Queued upload {upload.id} for local processing")
             
             processed_count += 1
             
         except Exception as e:
             logger.error(f"Failed to auto-process upload {upload.id}: {e}")
-            upload.processing_status = 'failed'
-            upload.save()
+            failed_ids.append(upload.id)
+    
+    if failed_ids:
+        # One UPDATE for every upload that couldn't be dispatched
+        AdminUpload.objects.filter(id__in=failed_ids).update(processing_status='failed')
     
     return processed_count
 
@@ -62,7 +124,7 @@ def process_stuck_uploads_automatically(max_age_hours=1):
 def ensure_pdf_processing(upload_id, timeout_minutes=5):
     """
     Ensure a PDF upload gets processed within a reasonable time.
-    Falls back to synchronous processing if Celery fails.
+    Falls back to the in-process pool if Celery fails.
     """
     try:
         upload = AdminUpload.objects.get(id=upload_id)
@@ -71,16 +133,16 @@ def ensure_pdf_processing(upload_id, timeout_minutes=5):
         if upload.processing_status == 'completed':
             return True
             
-        # Try Celery first
+        # Try Celery first. Either way, dispatch only once the caller's transaction commits,
+        # so the worker or pool thread never reads the upload before its row is visible
         if check_celery_worker_health():
-            task = process_pdf_and_create_vectorstore.delay(upload_id)
+            transaction.on_commit(lambda: process_pdf_and_create_vectorstore.delay(upload_id))
             logger.info(f"Queued upload {upload_id} for Celery processing")
             return True
         else:
-            # Fallback to synchronous processing
-            logger.warning(f"Celery unavailable, processing upload {upload_id} synchronously")
-            result = process_pdf_and_create_vectorstore(upload_id)
-            logger.info(f"Synchronously processed upload {upload_id}: {result}")
+            # Fallback to the in-process pool so the request returns immediately
+            logger.warning(f"Celery unavailable, processing upload {upload_id} locally")
+            transaction.on_commit(lambda: submit_local_processing(upload_id))
             return True
             
     except Exception as e:
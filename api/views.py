@@ -1,9 +1,11 @@
 # Core Django and DRF imports
 from django.conf import settings
 from django.contrib.auth import authenticate
+from django.core.cache import cache
 from django.core.files.storage import default_storage
-from django.db import models
+from django.db import connection, models
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
@@ -25,11 +27,11 @@ from rest_framework_simplejwt.tokens import RefreshToken
 # Third-party imports
 from django_filters.rest_framework import DjangoFilterBackend
 from functools import lru_cache
+import hashlib
 import google.generativeai as genai
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings, HuggingFacePipeline
+from langchain_huggingface import HuggingFacePipeline
 import os
 import re
 import threading
@@ -48,7 +50,12 @@ from .serializers import (
     FeedbackCreateSerializer, CareerSessionSerializer, 
     CareerSessionCreateSerializer, SavedCareerPredictionSerializer, SavedCareerPredictionCreateSerializer
 )
-from .tasks import process_pdf_and_create_vectorstore
+from .cache_utils import get_count_version
+from .tasks import (
+    ANSWER_CACHE_TTL, PROMPT_ONLINE, PROMPT_WITH_CONTEXT, embeddings_loaded, get_active_handbook,
+    get_answer_cache_key, get_embeddings, get_vectorstore, loaded_vectorstore_count,
+    process_pdf_and_create_vectorstore
+)
 
 # Configure Gemini once globally with error handling
 try:
@@ -69,16 +76,40 @@ def is_admin_user(user):
     """Helper function to check if user has admin privileges"""
     return user.is_admin or user.is_staff or user.is_superuser
 
+def count_querysets(**querysets):
+    """Helper function to count several querysets in a single round-trip, one scalar subquery each"""
+    subqueries, params = [], []
+    for queryset in querysets.values():
+        sql, query_params = queryset.order_by().values('pk').query.sql_with_params()
+        subqueries.append(f"(SELECT COUNT(*) FROM ({sql}) AS counted)")
+        params.extend(query_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(subqueries)}", params)
+        return dict(zip(querysets, cursor.fetchone()))
+
+# Admin dashboard totals are shared by every page load within a minute
+ADMIN_STATS_CACHE_TTL = 60
+
+# Row counts behind paginated lists are reused briefly; page 1 always recounts, and any
+# write to the model (see bump_count_version) invalidates the cached totals
+PAGINATION_COUNT_TTL = 300
+
+def get_paginated_count(queryset, page):
+    """Helper function to count a paginated queryset, caching the total for the later pages"""
+    label = queryset.model._meta.label_lower
+    query_hash = hashlib.sha256(str(queryset.query).encode('utf-8')).hexdigest()
+    cache_key = f"count:{label}:{get_count_version(label)}:{query_hash}"
+    if page > 1:
+        total = cache.get(cache_key)
+        if total is not None:
+            return total
+    total = queryset.count()
+    cache.set(cache_key, total, PAGINATION_COUNT_TTL)
+    return total
+
 def get_cached_embeddings():
-    with _cache_lock:
-        if 'embeddings' not in _model_cache:
-            print("Loading embeddings model (first time)...")
-            _model_cache['embeddings'] = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cuda' if torch.cuda.is_available() else 'cpu'}
-            )
-            print("Embeddings model loaded!")
-        return _model_cache['embeddings']
+    """Queries must be embedded exactly like the handbook chunks, so share the task's model"""
+    return get_embeddings()
 
 def get_cached_llm():
     """Get cached LLM pipeline or create new one"""
@@ -99,19 +130,6 @@ def get_cached_llm():
             print("LLM model loaded!")
         return _model_cache['llm']
 
-def get_cached_vectorstore(vectorstore_path):
-    """Get cached vectorstore or load from path"""
-    with _cache_lock:
-        cache_key = f'vectorstore_{vectorstore_path}'
-        if cache_key not in _model_cache:
-            print(f"Loading vectorstore from {vectorstore_path} (first time)...")
-            embeddings = get_cached_embeddings()
-            _model_cache[cache_key] = FAISS.load_local(
-                vectorstore_path, embeddings, allow_dangerous_deserialization=True
-            )
-            print("Vectorstore loaded!")
-        return _model_cache[cache_key]
-
 def warmup_models():
     """Warmup models on server start (optional)"""
     try:
@@ -235,7 +253,7 @@ class AdminUploadAPIView(APIView):
             )
         
         # Calculate pagination
-        total_uploads = uploads_query.count()
+        total_uploads = get_paginated_count(uploads_query, page)
         total_pages = (total_uploads + per_page - 1) // per_page
         start_index = (page - 1) * per_page
         end_index = start_index + per_page
@@ -276,22 +294,28 @@ class AdminDashboardAPIView(APIView):
         if not is_admin_user(request.user):
             return Response({"error": "Admin access required"}, status=403)
         
-        # Get dashboard statistics
-        stats = {
-            'total_students': User.objects.filter(user_type='student', active=True).count(),
-            'total_admins': User.objects.filter(user_type='admin', active=True).count(),
-            'total_uploads': AdminUpload.objects.filter(admin=request.user, active=True).count(),
-            'total_chats': ChatHistory.objects.filter(active=True).count(),
-            'total_predictions': PredictionSession.objects.filter(active=True).count(),
-            'total_saved_predictions': SavedPrediction.objects.filter(active=True).count(),
-            'total_career_sessions': CareerSession.objects.filter(active=True).count(),
-            'total_saved_career_predictions': SavedCareerPrediction.objects.count(),
-            'total_feedbacks': Feedback.objects.filter(active=True).count(),
-            'pending_uploads': AdminUpload.objects.filter(
-                admin=request.user, 
-                processing_status='pending'
-            ).count(),
-        }
+        # Get dashboard statistics; upload writes (new upload, reprocess, delete) show up at
+        # once through the upload count version, other totals may lag by the cache TTL
+        upload_version = get_count_version(AdminUpload._meta.label_lower)
+        stats_cache_key = f"admin_dashboard_stats:{request.user.pk}:{upload_version}"
+        stats = cache.get(stats_cache_key)
+        if stats is None:
+            stats = count_querysets(
+                total_students=User.objects.filter(user_type='student', active=True),
+                total_admins=User.objects.filter(user_type='admin', active=True),
+                total_uploads=AdminUpload.objects.filter(admin=request.user, active=True),
+                total_chats=ChatHistory.objects.filter(active=True),
+                total_predictions=PredictionSession.objects.filter(active=True),
+                total_saved_predictions=SavedPrediction.objects.filter(active=True),
+                total_career_sessions=CareerSession.objects.filter(active=True),
+                total_saved_career_predictions=SavedCareerPrediction.objects.all(),
+                total_feedbacks=Feedback.objects.filter(active=True),
+                pending_uploads=AdminUpload.objects.filter(
+                    admin=request.user, 
+                    processing_status='pending'
+                ),
+            )
+            cache.set(stats_cache_key, stats, ADMIN_STATS_CACHE_TTL)
         
         # Get recent feedbacks
         recent_feedbacks = Feedback.objects.filter(active=True).select_related('student')[:5]
@@ -323,7 +347,7 @@ class AdminDashboardAPIView(APIView):
             )
         
         # Calculate pagination
-        total_uploads = uploads_query.count()
+        total_uploads = get_paginated_count(uploads_query, page)
         total_pages = (total_uploads + per_page - 1) // per_page
         start_index = (page - 1) * per_page
         end_index = start_index + per_page
@@ -353,7 +377,7 @@ class AdminDashboardAPIView(APIView):
         recent_predictions = PredictionSession.objects.filter(active=True)[:5]
         predictions_data = [{
             'id': session.id,
-            'student': f"{session.student.first_name} {session.student.last_name}",
+            'student': session.student_full_name,
             'stream': session.stream,
             'z_score': session.z_score,
             'predicted_at': session.predicted_at,
@@ -382,6 +406,13 @@ class ChatAPIView(APIView):
         if not question:
             return Response({"error": "Question is required."}, status=400)
 
+        if request.query_params.get('stream') in ('1', 'true'):
+            # Send the answer as Gemini generates it instead of after the whole generation
+            return StreamingHttpResponse(
+                self._stream_question(request.user, question),
+                content_type='text/plain; charset=utf-8'
+            )
+
         try:
             # Process synchronously for now (instead of Celery)
             answer = self._process_question(request.user, question)
@@ -390,6 +421,41 @@ class ChatAPIView(APIView):
         except Exception as e:
             return Response({"error": f"Chat failed: {str(e)}"}, status=500)
 
+    def _build_prompt(self, question):
+        """Build the Gemini prompt from the active handbook, or ask for an online answer"""
+        context = ""
+
+        # Check for active handbook vectorstore (both cached, like in the ask_question task)
+        handbook = get_active_handbook()
+        vectorstore_path = handbook[1] if handbook else None
+        
+        if vectorstore_path:
+            try:
+                vectorstore = get_vectorstore(vectorstore_path)
+                retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
+                results = retriever.get_relevant_documents(question)
+
+                if results:
+                    context = "\n\n".join([doc.page_content for doc in results])
+                    # Prevent overloading Gemini
+                    context = context[:5000]
+            except Exception as e:
+                logger.exception(f"Vectorstore error: {e}")
+                context = ""
+
+        if context:
+            return PROMPT_WITH_CONTEXT.format(context=context, question=question)
+        return PROMPT_ONLINE.format(question=question)
+
+    def _gemini_error_answer(self, error):
+        """Turn a Gemini failure into the answer shown to the student"""
+        error_msg = str(error)
+        if "10054" in error_msg or "forcibly closed" in error_msg.lower():
+            logger.warning(f"Gemini API network error: {error_msg}")
+            return "I'm experiencing network connectivity issues. Please try again in a moment."
+        logger.error(f"Gemini API error: {error_msg}")
+        return "I'm unable to process your request at the moment. Please try again later."
+
     def _process_question(self, user, question):
         """Process question synchronously"""
         try:
@@ -398,55 +464,27 @@ class ChatAPIView(APIView):
             
             # Configure Gemini
             genai.configure(api_key=settings.GEMINI_API_KEY)
-            
-            context = ""
-            source = "UGC Handbook"
-
-            # Check for active handbook vectorstore
-            active_upload = AdminUpload.objects.filter(
-                active=True, 
-                processing_status='completed'
-            ).first()
-            
-            if active_upload and active_upload.vectorstore_path:
-                try:
-                    # Use cached embeddings and vectorstore
-                    embeddings = get_cached_embeddings()
-                    vectorstore = FAISS.load_local(
-                        active_upload.vectorstore_path, 
-                        embeddings, 
-                        allow_dangerous_deserialization=True
-                    )
-                    retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-                    results = retriever.get_relevant_documents(question)
 
-                    if results:
-                        context = "\n\n".join([doc.page_content for doc in results])
-                        # Prevent overloading Gemini
-                        context = context[:5000]
-                except Exception as e:
-                    print(f"Vectorstore error: {e}")
-                    context = ""
+            # Repeated questions against the same handbook reuse the earlier answer
+            handbook = get_active_handbook()
+            answer_cache_key = get_answer_cache_key(handbook[0] if handbook else None, question)
+            answer = cache.get(answer_cache_key)
 
-            # Generate response with Gemini
-            try:
-                model = genai.GenerativeModel("gemini-1.5-flash")
-                if context:
-                    prompt = f"Context (UGC Handbook):\n{context}\n\nQuestion: {question}"
-                else:
-                    prompt = f"Answer this question using reliable online sources:\n\n{question}"
-                    source = "Gemini Online"
-
-                response = model.generate_content(prompt)
-                answer = response.text if response else "No response from Gemini."
-            except Exception as e:
-                error_msg = str(e)
-                if "10054" in error_msg or "forcibly closed" in error_msg.lower():
-                    logger.warning(f"Gemini API network error: {error_msg}")
-                    answer = "I'm experiencing network connectivity issues. Please try again in a moment."
-                else:
-                    logger.error(f"Gemini API error: {error_msg}")
-                    answer = "I'm unable to process your request at the moment. Please try again later."
+            if answer is None:
+                prompt = self._build_prompt(question)
+
+                # Generate response with Gemini
+                try:
+                    model = genai.GenerativeModel("gemini-1.5-flash")
+                    response = model.generate_content(prompt)
+                    if response:
+                        answer = response.text
+                        # Only real answers are cached, never error fallbacks
+                        cache.set(answer_cache_key, answer, ANSWER_CACHE_TTL)
+                    else:
+                        answer = "No response from Gemini."
+                except Exception as e:
+                    answer = self._gemini_error_answer(e)
 
             # Save chat history
             ChatHistory.objects.create(
@@ -463,6 +501,32 @@ class ChatAPIView(APIView):
                 return "Free tier limit reached. Please try again tomorrow."
             return f"Chat error: {e}"
 
+    def _stream_question(self, user, question):
+        """Yield the Gemini answer chunk by chunk, saving the streamed answer once the stream ends"""
+        chunks = []
+        error_answer = None
+        try:
+            prompt = self._build_prompt(question)
+            model = genai.GenerativeModel("gemini-1.5-flash")
+            for chunk in model.generate_content(prompt, stream=True):
+                chunks.append(chunk.text)
+                yield chunk.text
+        except Exception as e:
+            error_msg = str(e).lower()
+            if "quota" in error_msg or "exceeded" in error_msg:
+                error_answer = "Free tier limit reached. Please try again tomorrow."
+            else:
+                error_answer = self._gemini_error_answer(e)
+            yield error_answer
+        finally:
+            # Also runs when the client disconnects mid-stream. Only Gemini's text is saved;
+            # the error notice is kept only when nothing was streamed, like _process_question
+            ChatHistory.objects.create(
+                student=user,
+                question=question,
+                answer="".join(chunks) if chunks else (error_answer or "")
+            )
+
 @method_decorator(csrf_exempt, name='dispatch')
 class PredictionAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -540,51 +604,78 @@ class PredictionAPIView(APIView):
                     "details": f"Available streams: {list(ml_predictor.valid_courses_map.keys()) if ml_predictor.valid_courses_map else 'No streams available'}"
                 }, status=400)
 
-            predictions = []
-            for i, pair in enumerate(course_university_pairs, 1):
-                try:
-                    course = pair['course_name']
-                    university = pair['university_name']
-                    logger.info(f"Processing course {i}/{len(course_university_pairs)}: {course} at {university}")
-
-                    # Predict cutoff
-                    logger.debug(f"Predicting cutoff for {course} at {university}")
-                    cutoff = ml_predictor.predict_cutoff(
-                        year=year,
-                        university=university,
-                        course_name=course,
-                        district=district,
-                        stream=stream,
-                        aptitude_test=aptitude_test,
-                        all_island_merit=all_island_merit
-                    )
-                    logger.debug(f"Cutoff prediction successful: {cutoff}")
-
-                    # Predict probability
-                    logger.debug(f"Predicting probability for {course} at {university}")
-                    prob = ml_predictor.predict_selection_probability(
-                        z_score=z_score,
-                        stream=stream,
-                        district=district,
-                        course_name=course,
-                        university=university,
-                        aptitude_test=aptitude_test,
-                        all_island_merit=all_island_merit
-                    )
-                    logger.debug(f"Probability prediction successful: {prob}")
-
-                    predictions.append({
-                        "university_name": university,
-                        "course_name": course,
-                        "predicted_cutoff": round(cutoff, 3),
-                        "predicted_probability": round(prob, 3),
-                        "recommendation": ml_predictor.get_recommendation_status(prob)
-                    })
-                    logger.info(f"Successfully processed course {i}/{len(course_university_pairs)}")
-
-                except Exception as e:
-                    logger.error(f"Error processing course {i} ({course} at {university}): {str(e)}", exc_info=True)
-                    continue
+            # Predict every pair with one regressor and one classifier call
+            prediction_rows = [{
+                'year': year,
+                'z_score': z_score,
+                'university': pair['university_name'],
+                'course_name': pair['course_name'],
+                'district': district,
+                'stream': stream,
+                'aptitude_test': aptitude_test,
+                'all_island_merit': all_island_merit
+            } for pair in course_university_pairs]
+            try:
+                cutoffs = ml_predictor.predict_cutoff_batch(prediction_rows)
+                probabilities = ml_predictor.predict_selection_probability_batch(prediction_rows)
+                predictions = [{
+                    "university_name": pair['university_name'],
+                    "course_name": pair['course_name'],
+                    "predicted_cutoff": round(cutoff, 3),
+                    "predicted_probability": round(prob, 3),
+                    "recommendation": ml_predictor.get_recommendation_status(prob)
+                } for pair, cutoff, prob in zip(course_university_pairs, cutoffs, probabilities)]
+            except Exception as e:
+                # Fall back to per-pair predictions so one bad pair doesn't fail the whole request
+                logger.warning(f"Batch prediction failed, predicting courses one at a time: {str(e)}")
+                predictions = None
+
+            if predictions is None:
+                predictions = []
+                for i, pair in enumerate(course_university_pairs, 1):
+                    try:
+                        course = pair['course_name']
+                        university = pair['university_name']
+                        logger.info(f"Processing course {i}/{len(course_university_pairs)}: {course} at {university}")
+
+                        # Predict cutoff
+                        logger.debug(f"Predicting cutoff for {course} at {university}")
+                        cutoff = ml_predictor.predict_cutoff(
+                            year=year,
+                            university=university,
+                            course_name=course,
+                            district=district,
+                            stream=stream,
+                            aptitude_test=aptitude_test,
+                            all_island_merit=all_island_merit
+                        )
+                        logger.debug(f"Cutoff prediction successful: {cutoff}")
+
+                        # Predict probability
+                        logger.debug(f"Predicting probability for {course} at {university}")
+                        prob = ml_predictor.predict_selection_probability(
+                            z_score=z_score,
+                            stream=stream,
+                            district=district,
+                            course_name=course,
+                            university=university,
+                            aptitude_test=aptitude_test,
+                            all_island_merit=all_island_merit
+                        )
+                        logger.debug(f"Probability prediction successful: {prob}")
+
+                        predictions.append({
+                            "university_name": university,
+                            "course_name": course,
+                            "predicted_cutoff": round(cutoff, 3),
+                            "predicted_probability": round(prob, 3),
+                            "recommendation": ml_predictor.get_recommendation_status(prob)
+                        })
+                        logger.info(f"Successfully processed course {i}/{len(course_university_pairs)}")
+
+                    except Exception as e:
+                        logger.error(f"Error processing course {i} ({course} at {university}): {str(e)}", exc_info=True)
+                        continue
 
             if not predictions:
                 logger.error("No predictions could be generated due to errors")
@@ -1186,9 +1277,9 @@ class ModelStatusAPIView(APIView):
             
             # Check if models are loaded
             models_status = {
-                'embeddings_loaded': 'embeddings' in _model_cache,
+                'embeddings_loaded': embeddings_loaded(),
                 'llm_loaded': 'llm' in _model_cache,
-                'vectorstore_count': len([k for k in _model_cache.keys() if k.startswith('vectorstore_')]),
+                'vectorstore_count': loaded_vectorstore_count(),
                 'cache_size': len(_model_cache),
                 'ml_prediction_models': ml_status,
                 'career_prediction_models': career_status
@@ -1242,9 +1333,10 @@ class RecommendationView(APIView):
             raw_recommendations = recommend_careers_logic(
                 degree_program,
                 career_predictor.hybrid_df,
-                None,  # occupation_tfidf_matrix is calculated within the function
+                career_predictor.occupation_tfidf_matrix,
                 career_predictor.tfidf_vectorizer,
-                career_predictor.occupation_df
+                career_predictor.occupation_df,
+                hybrid_soc_index=career_predictor.hybrid_soc_index
             )
 
             # Transform the data to match frontend expectations
@@ -1531,23 +1623,23 @@ class UserViewSet(ModelViewSet):
     def dashboard_stats(self, request):
         """Get user's dashboard statistics"""
         if request.user.is_student:
-            stats = {
-                'total_prediction_sessions': PredictionSession.objects.filter(student=request.user, active=True).count(),
-                'total_saved_predictions': SavedPrediction.objects.filter(student=request.user, active=True).count(),
-                'total_career_sessions': CareerSession.objects.filter(student=request.user, active=True).count(),
-                'total_saved_career_predictions': SavedCareerPrediction.objects.filter(student=request.user).count(),
-                'total_chats': ChatHistory.objects.filter(student=request.user, active=True).count(),
-                'total_feedbacks': Feedback.objects.filter(student=request.user, active=True).count(),
-            }
+            stats = count_querysets(
+                total_prediction_sessions=PredictionSession.objects.filter(student=request.user, active=True),
+                total_saved_predictions=SavedPrediction.objects.filter(student=request.user, active=True),
+                total_career_sessions=CareerSession.objects.filter(student=request.user, active=True),
+                total_saved_career_predictions=SavedCareerPrediction.objects.filter(student=request.user),
+                total_chats=ChatHistory.objects.filter(student=request.user, active=True),
+                total_feedbacks=Feedback.objects.filter(student=request.user, active=True),
+            )
         else:
-            stats = {
-                'total_students': User.objects.filter(user_type='student', active=True).count(),
-                'total_prediction_sessions': PredictionSession.objects.filter(active=True).count(),
-                'total_saved_predictions': SavedPrediction.objects.filter(active=True).count(),
-                'total_career_sessions': CareerSession.objects.filter(active=True).count(),
-                'total_chats': ChatHistory.objects.filter(active=True).count(),
-                'total_feedbacks': Feedback.objects.filter(active=True).count(),
-            }
+            stats = count_querysets(
+                total_students=User.objects.filter(user_type='student', active=True),
+                total_prediction_sessions=PredictionSession.objects.filter(active=True),
+                total_saved_predictions=SavedPrediction.objects.filter(active=True),
+                total_career_sessions=CareerSession.objects.filter(active=True),
+                total_chats=ChatHistory.objects.filter(active=True),
+                total_feedbacks=Feedback.objects.filter(active=True),
+            )
         return Response(stats)
 
     @action(detail=True, methods=['post'])
@@ -1599,7 +1691,7 @@ class PredictionSessionViewSet(ModelViewSet):
     def get_queryset(self):
         """Filter queryset based on user permissions"""
         if is_admin_user(self.request.user):
-            return PredictionSession.objects.filter(active=True).select_related('student')
+            return PredictionSession.objects.filter(active=True)
         else:
             # Students can only see their own sessions
             return PredictionSession.objects.filter(student=self.request.user, active=True)
@@ -1678,13 +1770,25 @@ class SavedPredictionViewSet(ModelViewSet):
     ordering_fields = ['saved_at', 'predicted_probability', 'predicted_cutoff']
     ordering = ['-saved_at']
 
+    # Columns SavedPredictionSerializer reads on list; the student name is stored on the row
+    # and the session id comes from the FK column, so neither users nor sessions are joined
+    LIST_ONLY_FIELDS = [
+        'id', 'student', 'student_full_name', 'session', 'university_name', 'course_name',
+        'predicted_cutoff', 'predicted_probability', 'probability_percentage',
+        'aptitude_test_required', 'all_island_merit', 'recommendation', 'rank_in_results',
+        'saved_at', 'notes', 'active'
+    ]
+
     def get_queryset(self):
         """Filter queryset based on user permissions"""
         if is_admin_user(self.request.user):
-            return SavedPrediction.objects.filter(active=True).select_related('student', 'session')
+            queryset = SavedPrediction.objects.filter(active=True)
         else:
             # Students can only see their own saved predictions
-            return SavedPrediction.objects.filter(student=self.request.user, active=True).select_related('session')
+            queryset = SavedPrediction.objects.filter(student=self.request.user, active=True)
+        if self.action == 'list':
+            return queryset.only(*self.LIST_ONLY_FIELDS)
+        return queryset.select_related('session')
 
     def get_serializer_class(self):
         """Use different serializers for different actions"""
@@ -1758,7 +1862,7 @@ class AdminUploadViewSet(ModelViewSet):
     def get_queryset(self):
         """Filter queryset based on user permissions"""
         if is_admin_user(self.request.user):
-            return AdminUpload.objects.filter(admin=self.request.user, active=True)
+            return AdminUpload.objects.filter(admin=self.request.user, active=True).select_related('admin')
         else:
             # Students cannot access admin uploads
             return AdminUpload.objects.none()
@@ -1817,7 +1921,7 @@ class ChatHistoryViewSet(ModelViewSet):
             return ChatHistory.objects.filter(active=True).select_related('student')
         else:
             # Students can only see their own chat history
-            return ChatHistory.objects.filter(student=self.request.user, active=True)
+            return ChatHistory.objects.filter(student=self.request.user, active=True).select_related('student')
 
     def get_serializer_class(self):
         """Use different serializers for different actions"""
@@ -1859,13 +1963,19 @@ class FeedbackViewSet(ModelViewSet):
     ordering_fields = ['submitted_at', 'rating']
     ordering = ['-submitted_at']
 
+    # Columns FeedbackSerializer reads when listing; the joined user row is trimmed to name/email
+    LIST_ONLY_FIELDS = [
+        'id', 'student', 'feedback', 'rating', 'submitted_at', 'active',
+        'student__first_name', 'student__last_name', 'student__email'
+    ]
+
     def get_queryset(self):
         """Filter queryset based on user permissions"""
-        if is_admin_user(self.request.user):
-            return Feedback.objects.filter(active=True).select_related('student')
-        else:
-            # Students can see all feedbacks but can only modify their own
-            return Feedback.objects.filter(active=True).select_related('student')
+        # Students can see all feedbacks but can only modify their own
+        queryset = Feedback.objects.filter(active=True).select_related('student')
+        if self.action in ('list', 'my_feedback'):
+            return queryset.only(*self.LIST_ONLY_FIELDS)
+        return queryset
 
     def get_serializer_class(self):
         """Use different serializers for different actions"""
@@ -1902,17 +2012,17 @@ class FeedbackViewSet(ModelViewSet):
     @action(detail=False, methods=['get'])
     def rating_summary(self, request):
         """Get feedback rating summary"""
-        queryset = self.get_queryset()
+        # One aggregate query: the total, the average and a filtered count per rating
+        rating_values = [value for value, _ in Feedback.RATING_CHOICES]
+        totals = self.get_queryset().aggregate(
+            total=models.Count('id'),
+            average_rating=models.Avg('rating'),
+            **{f'rating_{value}': models.Count('id', filter=Q(rating=value)) for value in rating_values}
+        )
         summary = {
-            'total': queryset.count(),
-            'average_rating': queryset.aggregate(avg_rating=models.Avg('rating'))['avg_rating'],
-            'rating_counts': {
-                1: queryset.filter(rating=1).count(),
-                2: queryset.filter(rating=2).count(),
-                3: queryset.filter(rating=3).count(),
-                4: queryset.filter(rating=4).count(),
-                5: queryset.filter(rating=5).count(),
-            }
+            'total': totals['total'],
+            'average_rating': totals['average_rating'],
+            'rating_counts': {value: totals[f'rating_{value}'] for value in rating_values}
         }
         return Response(summary)
 
@@ -1932,7 +2042,7 @@ class CareerSessionViewSet(ModelViewSet):
     def get_queryset(self):
         """Filter queryset based on user permissions"""
         if is_admin_user(self.request.user):
-            return CareerSession.objects.filter(active=True).select_related('student')
+            return CareerSession.objects.filter(active=True)
         else:
             # Students can only see their own career sessions
             return CareerSession.objects.filter(student=self.request.user, active=True)
@@ -1992,7 +2102,7 @@ class SavedCareerPredictionViewSet(ModelViewSet):
     def get_queryset(self):
         """Filter queryset based on user permissions"""
         if is_admin_user(self.request.user):
-            return SavedCareerPrediction.objects.all().select_related('student', 'session')
+            return SavedCareerPrediction.objects.all().select_related('session')
         else:
             # Students can only see their own saved career predictions
             return SavedCareerPrediction.objects.filter(student=self.request.user).select_related('session')
@@ -2031,6 +2141,20 @@ class SavedCareerPredictionViewSet(ModelViewSet):
             return Response(serializer.data)
         return Response({"error": "session_id parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """Save a list of career recommendations at once; ones already saved are skipped"""
+        serializer = SavedCareerPredictionCreateSerializer(
+            data=request.data, many=True, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        created = serializer.save(student=request.user)
+        # Skipped items were already saved (or repeated in the request) and have no new row
+        return Response(
+            {'created': len(created), 'skipped': len(request.data) - len(created)},
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=False, methods=['get'])
     def high_match(self, request):
         """Get saved career predictions with high match scores"""
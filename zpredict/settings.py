@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 # load .env file
@@ -142,10 +143,15 @@ CELERY_TIMEZONE = 'UTC'
 # Redis settings (if using Redis for Celery)
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
-# Temporarily use dummy cache instead of Redis to avoid connection errors
+# Per-process in-memory cache until Redis is properly configured. It backs the chat answer
+# cache, the active handbook lookup, pagination counts and the admin dashboard totals;
+# entries are not shared between processes, so invalidation only reaches the process
+# that made the change and everything else relies on short TTLs
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "zpredict",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
     }
 }
 
@@ -240,6 +246,12 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The test suite creates users in almost every setUp; PBKDF2 would dominate its runtime.
+# pytest is checked via sys.modules: xdist workers and `python -m pytest` have no pytest argv[0]
+TESTING = 'test' in sys.argv[1:2] or 'pytest' in sys.modules
+if TESTING:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/